@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.customers import routers as customers
 from app.api.auth import routers as authentication
+from app.api.internal import routers as internal
+from app.api.common.versions import client_version_header
 
 
 api = APIRouter()
@@ -9,8 +11,17 @@ api = APIRouter()
 
 api.include_router(
     customers.router, prefix="/customers", tags=["Customers"],
+    dependencies=[Depends(client_version_header)],
 )
 
 api.include_router(
     authentication.router, prefix="/auth", tags=["Authentication"],
+    dependencies=[Depends(client_version_header)],
 )
+
+api.include_router(
+    internal.router, prefix="/internal", tags=["Internal"],
+    include_in_schema=False,
+)
+
+api.include_router(internal.metrics_router, include_in_schema=False)
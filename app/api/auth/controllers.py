@@ -1,52 +1,74 @@
-from typing import Annotated
+import time
+import asyncio
+import hashlib
+import secrets
+from typing import Annotated, NamedTuple
+from uuid import UUID, uuid4
 
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+from sqlmodel import Session, delete, func, select, update
+from jose import JWTError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.config import jwt_settings
-from app.database import get_session
+from app.database import (
+    engine,
+    get_async_session,
+    get_session,
+    run_database_call
+)
+from app.utils.cache import TTLCache
 from app.utils.logger import logger_config
 from app.api.common.exceptions import UserCreationError
 
 from app.api.auth.schemas import (
     RecoverPasswordRequest,
-    AuthTokenDataResponse
+    AuthTokenDataResponse,
+    AuthPrincipal
 )
-from app.api.auth.models import AuthUser
+from app.api.auth.models import AuthUser, RefreshToken, normalize_username
+from app.api.auth.hashing import password_hasher
+from app.api.auth.tokens import token_service
+from app.api.common.membership import membership_filter
 
 
 logger = logger_config(__name__)
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+token_cache = TTLCache(
+    maxsize=jwt_settings.TOKEN_CACHE_MAXSIZE,
+    ttl=jwt_settings.TOKEN_CACHE_TTL_SECONDS)
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+principal_cache = TTLCache(
+    maxsize=jwt_settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=jwt_settings.PRINCIPAL_CACHE_TTL_SECONDS)
 
+credential_version_cache = TTLCache(
+    maxsize=jwt_settings.CREDENTIAL_VERSION_CACHE_MAXSIZE,
+    ttl=jwt_settings.CREDENTIAL_VERSION_CACHE_TTL_SECONDS)
 
-class JWTAuthController:
-    """Constroller class that handles Auth logic with the database."""
 
-    def get_password_hashed(self, password: str) -> str:
-        """Method that returns a hashed plain password."""
+class CredentialState(NamedTuple):
+    """Credential version and flags of a user checked for claims tokens."""
 
-        return pwd_context.hash(password)
+    credential_version: int
+    is_active: bool
+    is_superuser: bool
 
-    def verify_password(
-            self, plain_password: str,
-            hashed_password: str) -> CryptContext.hash:
-        """Method that verifies JWT hashing pasword."""
 
-        return pwd_context.verify(plain_password, hashed_password)
+def hash_refresh_token(refresh_token: str) -> str:
+    """Return the digest under which a refresh token is stored."""
 
-    def get_password_hash(self, password: str) -> CryptContext.hash:
-        """Method that hashes the password string from parameter."""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
 
-        return pwd_context.hash(password)
+
+class JWTAuthController:
+    """Constroller class that handles Auth logic with the database."""
 
     def create_access_token(
             self, data: dict, expires_delta: timedelta | None = None):
@@ -59,10 +81,28 @@ class JWTAuthController:
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
 
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(
-            to_encode, jwt_settings.SECRET_KEY, algorithm=jwt_settings.ALGORITHM)
 
-        return encoded_jwt
+        return token_service.encode(to_encode)
+
+    def decode_access_token(self, token: str) -> dict:
+        """Method that decodes a JWT token, reusing already verified claims.
+
+        Claims are cached by the token digest and never outlive the token
+        ``exp`` claim, so an expired token is always decoded again and
+        rejected by the token service.
+        """
+
+        token_digest = hashlib.sha256(token.encode()).digest()
+        payload = token_cache.get(token_digest)
+
+        if payload is None:
+            payload = token_service.decode(token)
+
+            if payload.get("exp") is not None:
+                token_cache.set(
+                    token_digest, payload, ttl=payload["exp"] - time.time())
+
+        return payload
 
 
 class UserController(JWTAuthController):
@@ -71,93 +111,533 @@ class UserController(JWTAuthController):
     def get_user(self, username: str, database_session: Session) -> AuthUser:
         """Method that retrieves an AuthUser row from the database."""
 
-        statement = select(AuthUser).where(AuthUser.username == username)
+        statement = select(AuthUser).where(
+            func.lower(AuthUser.username) == normalize_username(username))
         user = database_session.exec(statement).first()
 
         if user:
             return user
 
-    def get_current_user(
-            self, token: Annotated[str, Depends(oauth2_scheme)],
-            database_session: Session = Depends(get_session)) -> AuthUser:
-        """Method that retrieve the current authenticated AuthUser."""
+    def get_recent_users_statement(self):
+        """Method that selects the users the membership filter may miss."""
+
+        return select(AuthUser.id, AuthUser.username).where(
+            AuthUser.id > membership_filter.get_catch_up_id())
+
+    def get_recent_users(
+            self, database_session: Session) -> list[tuple[int, str]]:
+        """Method that returns the users stored since the filter was built."""
+
+        return database_session.exec(
+            self.get_recent_users_statement()).all()
 
-        credentials_exception = HTTPException(
+    def get_credentials_exception(self) -> HTTPException:
+        """Method that returns the error for invalid credentials."""
+
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    def get_token_data(self, token: str) -> AuthTokenDataResponse:
+        """Method that validates a token and returns its subject."""
+
+        credentials_exception = self.get_credentials_exception()
+
         try:
-            payload = jwt.decode(
-                token, jwt_settings.SECRET_KEY, algorithms=[jwt_settings.ALGORITHM])
+            payload = self.decode_access_token(token)
             username: str = payload.get("sub")
 
             if username is None:
                 raise credentials_exception
-            token_data = AuthTokenDataResponse(username=username)
+            token_data = AuthTokenDataResponse(
+                username=username,
+                user_id=payload.get("uid"),
+                customer_id=payload.get("cid"),
+                credential_version=payload.get("cv"),
+                is_active=payload.get("act", False),
+                is_superuser=payload.get("su", False)
+            )
         except JWTError:
             raise credentials_exception
 
+        return token_data
+
+    def get_access_token_claims(
+            self, user: AuthUser, customer_id: UUID | None = None) -> dict:
+        """Method that returns the claims of an access token for a user.
+
+        In claims mode the token also carries the user id, the customer id
+        and the credential version, so protected routes can trust it
+        without loading the AuthUser.
+        """
+
+        claims = {"sub": user.username}
+
+        if jwt_settings.ACCESS_TOKEN_CLAIMS_ENABLED:
+            claims.update({
+                "uid": user.id,
+                "cid": str(customer_id) if customer_id else None,
+                "cv": user.credential_version,
+                "act": user.is_active,
+                "su": user.is_superuser,
+            })
+            self.cache_credential_state(user)
+
+        return claims
+
+    def has_trusted_claims(self, token_data: AuthTokenDataResponse) -> bool:
+        """Method that checks if a token can be used without the AuthUser."""
+
+        return (
+            jwt_settings.ACCESS_TOKEN_CLAIMS_ENABLED
+            and token_data.user_id is not None
+            and token_data.credential_version is not None
+        )
+
+    def get_principal_from_claims(
+            self, token_data: AuthTokenDataResponse,
+            credential_state: CredentialState) -> AuthPrincipal:
+        """Method that builds the principal of trusted token claims.
+
+        The flags come from the looked up credential state rather than the
+        ``act`` and ``su`` claims, so changes apply to live tokens too.
+        """
+
+        return AuthPrincipal(
+            id=token_data.user_id,
+            username=token_data.username,
+            is_active=credential_state.is_active,
+            is_superuser=credential_state.is_superuser
+        )
+
+    def cache_credential_state(self, user: AuthUser) -> None:
+        """Method that caches the credential version and flags of a user."""
+
+        credential_version_cache.set(user.id, CredentialState(
+            user.credential_version, user.is_active, user.is_superuser))
+
+    def get_credential_state_statement(self, user_id: int):
+        """Method that selects the credential version and flags of a user."""
+
+        return select(
+            AuthUser.credential_version,
+            AuthUser.is_active,
+            AuthUser.is_superuser
+        ).where(AuthUser.id == user_id)
+
+    def get_credential_state(
+            self, user_id: int,
+            database_session: Session) -> CredentialState | None:
+        """Method that returns the credential version and flags of a user.
+
+        The state is cached for CREDENTIAL_VERSION_CACHE_TTL_SECONDS, which
+        bounds how long other workers accept tokens of a changed password.
+        """
+
+        credential_state = credential_version_cache.get(user_id)
+
+        if credential_state is None:
+            row = database_session.exec(
+                self.get_credential_state_statement(user_id)).first()
+
+            if row is not None:
+                credential_state = CredentialState(*row)
+                credential_version_cache.set(user_id, credential_state)
+
+        return credential_state
+
+    def verify_credential_state(
+            self, token_data: AuthTokenDataResponse,
+            credential_state: CredentialState | None) -> AuthPrincipal:
+        """Method that rejects tokens issued before a password change."""
+
+        if (credential_state is None
+                or credential_state.credential_version
+                != token_data.credential_version):
+            raise self.get_credentials_exception()
+
+        return self.get_principal_from_claims(token_data, credential_state)
+
+    def check_credential_version(
+            self, token_data: AuthTokenDataResponse,
+            database_session: Session) -> AuthPrincipal:
+        """Method that checks trusted claims and returns their principal."""
+
+        return self.verify_credential_state(
+            token_data,
+            self.get_credential_state(token_data.user_id, database_session))
+
+    def cache_principal(self, user: AuthUser) -> AuthPrincipal:
+        """Method that builds and caches the principal of an AuthUser."""
+
+        principal = AuthPrincipal(
+            id=user.id,
+            username=user.username,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser
+        )
+        principal_cache.set(normalize_username(user.username), principal)
+
+        return principal
+
+    def get_current_user(
+            self, token: Annotated[str, Depends(oauth2_scheme)],
+            database_session: Session = Depends(get_session)
+    ) -> AuthPrincipal:
+        """Method that retrieve the current authenticated AuthUser."""
+
+        token_data = self.get_token_data(token)
+
+        if self.has_trusted_claims(token_data):
+            return self.check_credential_version(token_data, database_session)
+
+        principal = principal_cache.get(
+            normalize_username(token_data.username))
+
+        if principal is not None:
+            return principal
+
         user = self.get_user(
             username=token_data.username, database_session=database_session)
 
         if user is None:
-            raise credentials_exception
+            raise self.get_credentials_exception()
 
-        return user
+        return self.cache_principal(user)
 
-    def authenticate_user(
+    async def authenticate_user(
             self, username: str, password: str,
             database_session: Session) -> AuthUser:
-        """Methot that authenticates a user using the credentials."""
+        """Methot that authenticates a user using the credentials.
+
+        Passwords hashed with another bcrypt cost than the configured one
+        are rehashed and saved on a successful login.
+        """
+
+        if not membership_filter.contains("username", username):
+            membership_filter.catch_up(await run_database_call(
+                self.get_recent_users, database_session))
+
+            if not membership_filter.might_contain("username", username):
+                return False
 
-        user = self.get_user(username, database_session)
+        user = await run_database_call(
+            self.get_user, username, database_session)
 
         if not user:
+            membership_filter.record_false_positive()
             return False
-        if not self.verify_password(password, user.password):
+
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.password)
+
+        if not verified or not user.is_active:
             return False
 
+        if new_hash is not None:
+            user.password = new_hash
+            user = await run_database_call(
+                self.save_user, user, database_session)
+
         return user
 
-    def create_user_in_database(
+    def save_user(self, user: AuthUser, database_session: Session) -> AuthUser:
+        """Method that persists an AuthUser instance into the database."""
+
+        try:
+            database_session.add(user)
+            database_session.commit()
+            database_session.refresh(user)
+
+            return user
+
+        except UserCreationError as error:
+            logger.error(error.message.format(user.username))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service error, transactions will Rollback."
+            )
+
+    async def create_user_in_database(
             self, set_password_request: RecoverPasswordRequest,
             session: Session) -> AuthUser:
         """Creare a new AuthUser instance into the database."""
 
-        hashed_password = self.get_password_hashed(set_password_request.password)
+        hashed_password = await password_hasher.hash(
+            set_password_request.password)
         set_password_request.password = hashed_password
 
         new_user = AuthUser(
-            username=set_password_request.email,
-            password=set_password_request.password
+            username=normalize_username(set_password_request.email),
+            password=set_password_request.password,
+            is_active=True
         )
 
-        try:
-            session.add(new_user)
-            session.commit()
-            session.refresh(new_user)
-            return new_user
+        new_user = await run_database_call(self.save_user, new_user, session)
+        principal_cache.invalidate(new_user.username)
+        membership_filter.add("username", new_user.username)
 
-        except UserCreationError as error:
-            logger.error(error.message.format(new_user.username))
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database service error, transactions will Rollback.")
+        return new_user
 
-    def update_user_password(
+    async def update_user_password(
             self, user: AuthUser, new_password: str,
             database_session: Session) -> AuthUser:
-        """Method that updates the password of an AuthUser instance."""
+        """Method that updates the password and revokes refresh tokens."""
 
-        hashed_password = self.get_password_hashed(new_password)
+        hashed_password = await password_hasher.hash(new_password)
         user.password = hashed_password
+        user.credential_version += 1
+
+        await run_database_call(
+            self.revoke_refresh_tokens, user.id, database_session)
+        user = await run_database_call(self.save_user, user, database_session)
+        principal_cache.invalidate(normalize_username(user.username))
+        self.cache_credential_state(user)
+
+        return user
+
+    async def compare_hash_passwords(
+            self, user: AuthUser, request_password: str) -> None:
+        """Method that compares hashed password in database."""
+
+        if not await password_hasher.verify(request_password, user.password):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Old Password does not match."
+            )
+
+    def get_refresh_token_exception(self) -> HTTPException:
+        """Method that returns the error for an invalid refresh token."""
+
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    def add_refresh_token(
+            self, user_id: int, database_session: Session,
+            family_id: str | None = None) -> str:
+        """Method that adds a new refresh token to the session.
+
+        The plain token is returned to the client and only its digest is
+        stored. Tokens without a family start a new one.
+        """
+
+        refresh_token = secrets.token_urlsafe(32)
+        expires_at = datetime.utcnow() + timedelta(
+            days=jwt_settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+        database_session.add(RefreshToken(
+            token_hash=hash_refresh_token(refresh_token),
+            family_id=family_id or uuid4().hex,
+            user_id=user_id,
+            expires_at=expires_at
+        ))
+
+        return refresh_token
+
+    def get_refresh_token_statement(self, refresh_token: str):
+        """Method that selects a stored refresh token and its AuthUser."""
+
+        return (
+            select(RefreshToken, AuthUser)
+            .join(AuthUser, AuthUser.id == RefreshToken.user_id)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        )
+
+    def get_use_refresh_token_statement(self, stored_token: RefreshToken):
+        """Method that marks a refresh token used unless it already was."""
+
+        return (
+            update(RefreshToken)
+            .where(
+                RefreshToken.id == stored_token.id,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None))
+            .values(used_at=datetime.utcnow())
+        )
+
+    def get_revoke_refresh_tokens_statement(self, *criteria):
+        """Method that revokes the live refresh tokens matching criteria."""
+
+        return (
+            update(RefreshToken)
+            .where(RefreshToken.revoked_at.is_(None), *criteria)
+            .values(revoked_at=datetime.utcnow())
+        )
+
+    def get_valid_refresh_row(self, row: tuple | None) -> tuple:
+        """Method that rejects unknown, expired and inactive refresh tokens."""
+
+        if (row is None or row[0].expires_at <= datetime.utcnow()
+                or not row[1].is_active):
+            raise self.get_refresh_token_exception()
+
+        return row
+
+    def get_reused_refresh_token_exception(
+            self, stored_token: RefreshToken, user: AuthUser) -> HTTPException:
+        """Method that logs a refresh token reuse and returns its error."""
+
+        logger.warning(
+            "Refresh token reused for %s, token family %s revoked.",
+            user.username, stored_token.family_id)
+
+        return self.get_refresh_token_exception()
+
+    def issue_refresh_token(
+            self, user_id: int, database_session: Session) -> str:
+        """Method that creates and persists a refresh token for a user."""
+
+        refresh_token = self.add_refresh_token(user_id, database_session)
+        database_session.commit()
+
+        return refresh_token
+
+    def rotate_refresh_token(
+            self, refresh_token: str,
+            database_session: Session) -> tuple[AuthUser, str]:
+        """Method that exchanges a refresh token for a new one.
+
+        The token is marked used with a conditional update, so of two
+        concurrent exchanges only one wins. Presenting a used or revoked
+        token again is treated as theft and revokes its whole family.
+        """
+
+        stored_token, user = self.get_valid_refresh_row(
+            database_session.exec(
+                self.get_refresh_token_statement(refresh_token)).first())
+
+        result = database_session.exec(
+            self.get_use_refresh_token_statement(stored_token))
+
+        if result.rowcount != 1:
+            reused_exception = self.get_reused_refresh_token_exception(
+                stored_token, user)
+
+            database_session.exec(self.get_revoke_refresh_tokens_statement(
+                RefreshToken.family_id == stored_token.family_id))
+            database_session.commit()
+
+            raise reused_exception
+
+        new_refresh_token = self.add_refresh_token(
+            user.id, database_session, stored_token.family_id)
+
+        database_session.expunge(user)
+        database_session.commit()
+
+        return user, new_refresh_token
+
+    def revoke_refresh_tokens(
+            self, user_id: int, database_session: Session) -> None:
+        """Method that revokes every refresh token of a user, uncommitted."""
+
+        database_session.exec(self.get_revoke_refresh_tokens_statement(
+            RefreshToken.user_id == user_id))
+
+    def delete_expired_refresh_tokens(self, database_session: Session) -> int:
+        """Method that deletes expired refresh tokens, returns their count.
+
+        Used and revoked tokens are kept until they expire, so reusing them
+        is still detected as theft.
+        """
+
+        result = database_session.exec(
+            delete(RefreshToken).where(
+                RefreshToken.expires_at <= datetime.utcnow()))
+        database_session.commit()
+
+        return result.rowcount
+
+
+class AsyncUserController(UserController):
+    """Controller Class that handles AuthUser with an async database session."""
+
+    async def get_user(
+            self, username: str, database_session: AsyncSession) -> AuthUser:
+        """Method that retrieves an AuthUser row from the database."""
+
+        statement = select(AuthUser).where(
+            func.lower(AuthUser.username) == normalize_username(username))
+        user = (await database_session.exec(statement)).first()
+
+        if user:
+            return user
+
+    async def get_recent_users(
+            self,
+            database_session: AsyncSession) -> list[tuple[int, str]]:
+        """Method that returns the users stored since the filter was built."""
+
+        return (await database_session.exec(
+            self.get_recent_users_statement())).all()
+
+    async def get_credential_state(
+            self, user_id: int,
+            database_session: AsyncSession) -> CredentialState | None:
+        """Method that returns the credential version and flags of a user."""
+
+        credential_state = credential_version_cache.get(user_id)
+
+        if credential_state is None:
+            row = (await database_session.exec(
+                self.get_credential_state_statement(user_id))).first()
+
+            if row is not None:
+                credential_state = CredentialState(*row)
+                credential_version_cache.set(user_id, credential_state)
+
+        return credential_state
+
+    async def check_credential_version(
+            self, token_data: AuthTokenDataResponse,
+            database_session: AsyncSession) -> AuthPrincipal:
+        """Method that checks trusted claims and returns their principal."""
+
+        return self.verify_credential_state(
+            token_data,
+            await self.get_credential_state(
+                token_data.user_id, database_session))
+
+    async def get_current_user(
+            self, token: Annotated[str, Depends(oauth2_scheme)],
+            database_session: AsyncSession = Depends(get_async_session)
+    ) -> AuthPrincipal:
+        """Method that retrieve the current authenticated AuthUser."""
+
+        token_data = self.get_token_data(token)
+
+        if self.has_trusted_claims(token_data):
+            return await self.check_credential_version(
+                token_data, database_session)
+
+        principal = principal_cache.get(
+            normalize_username(token_data.username))
+
+        if principal is not None:
+            return principal
+
+        user = await self.get_user(
+            username=token_data.username, database_session=database_session)
+
+        if user is None:
+            raise self.get_credentials_exception()
+
+        return self.cache_principal(user)
+
+    async def save_user(
+            self, user: AuthUser, database_session: AsyncSession) -> AuthUser:
+        """Method that persists an AuthUser instance into the database."""
 
         try:
             database_session.add(user)
-            database_session.commit()
-            database_session.refresh(user)
+            await database_session.commit()
+            await database_session.refresh(user)
 
             return user
 
@@ -168,12 +648,70 @@ class UserController(JWTAuthController):
                 detail="Database service error, transactions will Rollback."
             )
 
-    def compare_hash_passwords(
-            self, user: AuthUser, request_password: str) -> None:
-        """Method that compares hashed password in database."""
+    async def issue_refresh_token(
+            self, user_id: int, database_session: AsyncSession) -> str:
+        """Method that creates and persists a refresh token for a user."""
 
-        if not self.verify_password(request_password, user.password):
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Old Password does not match."
-            )
+        refresh_token = self.add_refresh_token(user_id, database_session)
+        await database_session.commit()
+
+        return refresh_token
+
+    async def rotate_refresh_token(
+            self, refresh_token: str,
+            database_session: AsyncSession) -> tuple[AuthUser, str]:
+        """Method that exchanges a refresh token for a new one."""
+
+        stored_token, user = self.get_valid_refresh_row(
+            (await database_session.exec(
+                self.get_refresh_token_statement(refresh_token))).first())
+
+        result = await database_session.exec(
+            self.get_use_refresh_token_statement(stored_token))
+
+        if result.rowcount != 1:
+            reused_exception = self.get_reused_refresh_token_exception(
+                stored_token, user)
+
+            await database_session.exec(
+                self.get_revoke_refresh_tokens_statement(
+                    RefreshToken.family_id == stored_token.family_id))
+            await database_session.commit()
+
+            raise reused_exception
+
+        new_refresh_token = self.add_refresh_token(
+            user.id, database_session, stored_token.family_id)
+
+        database_session.expunge(user)
+        await database_session.commit()
+
+        return user, new_refresh_token
+
+    async def revoke_refresh_tokens(
+            self, user_id: int, database_session: AsyncSession) -> None:
+        """Method that revokes every refresh token of a user, uncommitted."""
+
+        await database_session.exec(self.get_revoke_refresh_tokens_statement(
+            RefreshToken.user_id == user_id))
+
+
+def prune_refresh_tokens() -> int:
+    """Delete the expired refresh tokens, returns how many were deleted."""
+
+    with Session(engine) as database_session:
+        return UserController().delete_expired_refresh_tokens(
+            database_session)
+
+
+async def prune_refresh_tokens_periodically(interval: float) -> None:
+    """Delete the expired refresh tokens every interval seconds."""
+
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            deleted = await run_in_threadpool(prune_refresh_tokens)
+            logger.info("refresh tokens: %s expired tokens deleted", deleted)
+        except Exception as error:
+            logger.error("refresh token pruning failed: %s", error)
@@ -0,0 +1,219 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from passlib.hash import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+from app.config import hashing_settings
+from app.utils.logger import logger_config
+from app.utils.metrics import timed_section
+
+
+logger = logger_config(__name__)
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Return the bcrypt hash of a plain password."""
+
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against a bcrypt hash."""
+
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(
+        plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password and return a new hash when its cost is outdated."""
+
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_bcrypt_rounds() -> int:
+    """Return the bcrypt cost used for new hashes."""
+
+    return pwd_context.handler("bcrypt").default_rounds
+
+
+def get_bcrypt_min_rounds() -> int | None:
+    """Return the lowest bcrypt cost accepted for stored hashes."""
+
+    return pwd_context.handler("bcrypt").min_desired_rounds
+
+
+def configure_bcrypt_rounds(
+        rounds: int, min_rounds: int | None = None) -> None:
+    """Hash with the given bcrypt cost and flag hashes below the minimum.
+
+    Stored hashes with a cost lower than ``min_rounds``, the new cost when
+    it is not given, are reported by ``needs_update`` and rehashed at the
+    next successful login. Higher costs are kept, so workers configured
+    with different costs never rehash each other's passwords back and forth.
+    """
+
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=min_rounds if min_rounds is not None else rounds,
+        bcrypt__max_rounds=None)
+
+
+def measure_bcrypt_rounds(rounds: int, samples: int = 3) -> float:
+    """Return the fastest of several hashes with a bcrypt cost, in seconds."""
+
+    handler = bcrypt.using(rounds=rounds)
+    durations = []
+
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration-password")
+        durations.append(time.perf_counter() - started)
+
+    return min(durations)
+
+
+def calibrate_bcrypt_rounds(
+        target_seconds: float, min_rounds: int, max_rounds: int) -> int:
+    """Return the highest bcrypt cost whose hash stays within the target.
+
+    Every extra round doubles the hashing time, the cost is raised from
+    ``min_rounds`` until the next one would exceed the target on this host.
+    """
+
+    rounds = min_rounds
+    duration = measure_bcrypt_rounds(rounds)
+    logger.info("bcrypt: %s rounds take %.1f ms", rounds, duration * 1000)
+
+    while rounds < max_rounds and duration * 2 <= target_seconds:
+        rounds += 1
+        duration = measure_bcrypt_rounds(rounds)
+        logger.info("bcrypt: %s rounds take %.1f ms", rounds, duration * 1000)
+
+    if duration > target_seconds and rounds > min_rounds:
+        rounds -= 1
+
+    return rounds
+
+
+if hashing_settings.BCRYPT_ROUNDS:
+    configure_bcrypt_rounds(hashing_settings.BCRYPT_ROUNDS)
+
+
+class PasswordHashingService:
+    """Service that runs bcrypt work in a bounded worker pool.
+
+    When the pool is disabled the work is sent to the default Starlette
+    threadpool, which keeps the previous behaviour. When it is enabled
+    bcrypt runs in a dedicated executor and at most ``max_workers`` plus
+    ``queue_depth`` calls can be in flight, extra calls are rejected with
+    a 503 instead of waiting in line.
+    """
+
+    def __init__(
+            self, enabled: bool, executor: str,
+            max_workers: int, queue_depth: int):
+        self.enabled = enabled
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+
+        self._executor: Executor | None = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self.rejected: int = 0
+
+    def get_executor(self) -> Executor:
+        """Lazily create the executor that runs the bcrypt calls."""
+
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            initializer=configure_bcrypt_rounds,
+                            initargs=(
+                                get_bcrypt_rounds(),
+                                get_bcrypt_min_rounds()))
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="bcrypt")
+
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the executor if it was started."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, function, *args):
+        """Run a hashing function in the pool or reject when it is full."""
+
+        if not self.enabled:
+            return await run_in_threadpool(function, *args)
+
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            logger.warning("Password hashing queue is full, request rejected.")
+
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, try again later.",
+                headers={"Retry-After": "1"})
+
+        try:
+            future = self.get_executor().submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # The slot is held until bcrypt is done in the executor, a cancelled
+        # request must not free it while its call is still running there.
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Hash a plain password without blocking the event loop."""
+
+        with timed_section("bcrypt"):
+            return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+
+        with timed_section("bcrypt"):
+            return await self.run(
+                verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+            self, plain_password: str,
+            hashed_password: str) -> tuple[bool, str | None]:
+        """Verify a password and rehash it when its cost is outdated."""
+
+        with timed_section("bcrypt"):
+            return await self.run(
+                verify_and_update_password, plain_password, hashed_password)
+
+
+password_hasher = PasswordHashingService(
+    enabled=hashing_settings.HASHING_POOL_ENABLED,
+    executor=hashing_settings.HASHING_POOL_EXECUTOR,
+    max_workers=hashing_settings.HASHING_POOL_MAX_WORKERS,
+    queue_depth=hashing_settings.HASHING_POOL_QUEUE_DEPTH,
+)
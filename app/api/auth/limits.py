@@ -0,0 +1,151 @@
+import math
+import ipaddress
+
+from fastapi import HTTPException, Request, status
+
+from app.config import login_rate_limit_settings
+from app.utils.logger import logger_config
+from app.utils.ratelimit import TokenBucketStore
+
+
+logger = logger_config(__name__)
+
+
+class LoginRateLimiter:
+    """Admission control of login attempts by username and client IP.
+
+    Every attempt takes a token from the bucket of its client IP and of its
+    username before any database lookup or bcrypt work. Successful logins
+    give their tokens back, so only failed attempts use up the budget.
+    """
+
+    def __init__(
+            self, enabled: bool, username_store: TokenBucketStore,
+            ip_store: TokenBucketStore, trusted_proxies: list | None = None):
+        self.enabled = enabled
+        self.username_store = username_store
+        self.ip_store = ip_store
+        self.trusted_proxies = trusted_proxies or []
+
+    def is_trusted_proxy(self, address: str) -> bool:
+        """Return whether an address belongs to a trusted proxy."""
+
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+
+        return any(ip in network for network in self.trusted_proxies)
+
+    def get_client_ip(self, request: Request) -> str:
+        """Return the client IP of a request, behind the trusted proxies.
+
+        X-Forwarded-For is only read when the peer is a trusted proxy, and
+        the client is the right-most address not added by one of them.
+        """
+
+        client_ip = request.client.host if request.client else "unknown"
+
+        if not self.is_trusted_proxy(client_ip):
+            return client_ip
+
+        forwarded_for = request.headers.get("x-forwarded-for", "")
+        forwarded_ips = [
+            address.strip()
+            for address in forwarded_for.split(",") if address.strip()
+        ]
+
+        for forwarded_ip in reversed(forwarded_ips):
+            client_ip = forwarded_ip
+
+            if not self.is_trusted_proxy(forwarded_ip):
+                break
+
+        return client_ip
+
+    def get_rate_limit_exception(self, retry_after: float) -> HTTPException:
+        """Return the error of a rejected login attempt."""
+
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))})
+
+    def check(self, username: str, client_ip: str) -> None:
+        """Take a login attempt token or raise a 429 error."""
+
+        if not self.enabled:
+            return
+
+        retry_after = self.ip_store.acquire(client_ip)
+
+        if retry_after:
+            logger.warning("Login attempts of %s shed by IP.", client_ip)
+            raise self.get_rate_limit_exception(retry_after)
+
+        retry_after = self.username_store.acquire(username)
+
+        if retry_after:
+            self.ip_store.release(client_ip)
+            logger.warning("Login attempts of %s shed by username.", username)
+            raise self.get_rate_limit_exception(retry_after)
+
+    def release(self, username: str, client_ip: str) -> None:
+        """Give back the tokens of a successful login."""
+
+        if not self.enabled:
+            return
+
+        self.username_store.release(username)
+        self.ip_store.release(client_ip)
+
+    def stats(self) -> dict:
+        """Return the counters of both token bucket stores."""
+
+        return {
+            "username": self.username_store.stats(),
+            "ip": self.ip_store.stats(),
+        }
+
+
+def get_token_bucket_store(burst: int, per_minute: float) -> TokenBucketStore:
+    """Return a token bucket store using the configured sharding.
+
+    Buckets refill ``per_minute`` tokens a minute, a rate of 0 would never refill
+    them, so it is refused while the limiter is enabled. The limiter is
+    turned off with LOGIN_RATE_LIMIT_ENABLED instead.
+    """
+
+    if login_rate_limit_settings.LOGIN_RATE_LIMIT_ENABLED and per_minute <= 0:
+        raise ValueError(
+            "LOGIN_USERNAME_PER_MINUTE and LOGIN_IP_PER_MINUTE must be "
+            "greater than 0, set LOGIN_RATE_LIMIT_ENABLED=false to turn "
+            "the login rate limit off.")
+
+    return TokenBucketStore(
+        capacity=burst,
+        rate=per_minute / 60,
+        shards=login_rate_limit_settings.LOGIN_RATE_LIMIT_SHARDS,
+        sweep_interval=login_rate_limit_settings.LOGIN_RATE_LIMIT_SWEEP_SECONDS)
+
+
+def get_trusted_proxies(value: str) -> list:
+    """Return the networks of a comma separated list of proxy addresses."""
+
+    return [
+        ipaddress.ip_network(address.strip(), strict=False)
+        for address in value.split(",") if address.strip()
+    ]
+
+
+login_rate_limiter = LoginRateLimiter(
+    enabled=login_rate_limit_settings.LOGIN_RATE_LIMIT_ENABLED,
+    username_store=get_token_bucket_store(
+        login_rate_limit_settings.LOGIN_USERNAME_BURST,
+        login_rate_limit_settings.LOGIN_USERNAME_PER_MINUTE),
+    ip_store=get_token_bucket_store(
+        login_rate_limit_settings.LOGIN_IP_BURST,
+        login_rate_limit_settings.LOGIN_IP_PER_MINUTE),
+    trusted_proxies=get_trusted_proxies(
+        login_rate_limit_settings.LOGIN_TRUSTED_PROXIES),
+)
@@ -1,9 +1,17 @@
 from datetime import datetime
+from typing import Optional
 from pydantic import EmailStr
 
+from sqlalchemy import Index, func
 from sqlmodel import SQLModel, AutoString, Field
 
 
+def normalize_username(username: str) -> str:
+    """Return the canonical form used to store and look up usernames."""
+
+    return username.strip().lower()
+
+
 class AuthUser(SQLModel, table=True):
     """Model that represents the table for AuthUser in the database."""
 
@@ -12,6 +20,7 @@ class AuthUser(SQLModel, table=True):
     password: str
     is_active: bool = False
     is_superuser: bool = False
+    credential_version: int = Field(default=0, nullable=False)
     created_at: datetime = Field(default=datetime.utcnow(), nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
@@ -20,3 +29,29 @@ class AuthUser(SQLModel, table=True):
         for key in self.__mapper__.c.keys():
             dict_[key] = getattr(self, key)
         return dict_
+
+
+Index(
+    "ix_authuser_username_lower",
+    func.lower(AuthUser.username),
+    unique=True
+)
+
+
+class RefreshToken(SQLModel, table=True):
+    """Model that represents the table for refresh tokens in the database.
+
+    Only the sha256 digest of a token is stored. Tokens rotated from the
+    same login share a family, so reusing a rotated token can revoke the
+    whole family.
+    """
+
+    id: int = Field(nullable=False, primary_key=True)
+    token_hash: str = Field(nullable=False, unique=True, index=True)
+    family_id: str = Field(nullable=False, index=True)
+    user_id: int = Field(
+        foreign_key="authuser.id", nullable=False, index=True)
+    expires_at: datetime = Field(nullable=False, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    used_at: Optional[datetime] = Field(default=None, nullable=True)
+    revoked_at: Optional[datetime] = Field(default=None, nullable=True)
@@ -1,65 +1,79 @@
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
 
-from app.database import get_session
+from app.database import get_database_session, run_database_call
 from app.api.auth.schemas import (
     ResetPasswordRequest,
     RecoverPasswordRequest,
+    RefreshTokenRequest,
     AuthTokenResponse,
     PasswordCreatedResponse,
-    PasswordRessetedResponse
+    PasswordRessetedResponse,
+    AuthPrincipal
 )
-from app.api.auth.models import AuthUser
 
-from app.api.auth.controllers import UserController
-from app.api.customers.controllers import CustomerController
-from app.api.common.versions import VersionConstroller
-from app.config import jwt_settings
+from app.api.auth.controllers import (
+    AsyncUserController,
+    UserController,
+    normalize_username
+)
+from app.api.auth.limits import login_rate_limiter
+from app.api.auth.models import AuthUser
+from app.api.customers.controllers import (
+    AsyncCustomerController,
+    CustomerController
+)
+from app.config import jwt_settings, settings
 
 
 router = APIRouter()
-user_controller = UserController()
-customer_controller = CustomerController()
-version_controller = VersionConstroller()
 
-annotated_auth_user = Annotated[AuthUser, Depends(
+if settings.ASYNC_DATABASE:
+    user_controller = AsyncUserController()
+    customer_controller = AsyncCustomerController()
+else:
+    user_controller = UserController()
+    customer_controller = CustomerController()
+
+annotated_auth_user = Annotated[AuthPrincipal, Depends(
     user_controller.get_current_user)]
 
 
 @router.post(
     "/recover-password",
     response_model=PasswordCreatedResponse)
-def recover_password(
+async def recover_password(
         payload: RecoverPasswordRequest,
-        database_session: Session = Depends(get_session),
-        client_version: str = Header(...)) -> PasswordCreatedResponse:
+        database_session: Session = Depends(get_database_session)
+) -> PasswordCreatedResponse:
     """Set password for an importend customer and create AutUser."""
 
-    version_controller.is_valid_version(client_version)
-
     if not payload.recovery_code == jwt_settings.FIXED_RECOVERY_CODE:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Recovery Code sent by email is incorrect."
         )
 
-    imported_customer = customer_controller.get_customer_profile(
+    imported_customer = await run_database_call(
+        customer_controller.get_customer_profile,
         payload.email, database_session)
 
-    user = user_controller.get_user(payload.email, database_session)
+    user = await run_database_call(
+        user_controller.get_user, payload.email, database_session)
 
     if user:
-        user = user_controller.update_user_password(
+        user = await user_controller.update_user_password(
             user, payload.password, database_session)
     else:
-        user = user_controller.create_user_in_database(
+        user = await user_controller.create_user_in_database(
             payload, database_session)
 
-    customer = customer_controller.activate_customer_account(
+    customer = await run_database_call(
+        customer_controller.activate_customer_account,
         user, imported_customer, database_session)
 
     return PasswordCreatedResponse(
@@ -67,35 +81,62 @@ def recover_password(
 
 
 @router.post("/reset-password", response_model=PasswordRessetedResponse)
-def reset_password(
+async def reset_password(
         request: ResetPasswordRequest,
         authenticate_user: annotated_auth_user,
-        database_session: Session = Depends(get_session),
-        client_version: str = Header(...)) -> PasswordRessetedResponse:
+        database_session: Session = Depends(get_database_session)
+) -> PasswordRessetedResponse:
     """Reset password for an importend customer and update AutUser."""
 
-    version_controller.is_valid_version(client_version)
+    user = await run_database_call(
+        user_controller.get_user,
+        authenticate_user.username, database_session)
 
-    user_controller.compare_hash_passwords(
-        authenticate_user, request.old_password)
+    if user is None:
+        raise user_controller.get_credentials_exception()
 
-    user = user_controller.update_user_password(
-        authenticate_user, request.new_password, database_session)
+    await user_controller.compare_hash_passwords(user, request.old_password)
+
+    user = await user_controller.update_user_password(
+        user, request.new_password, database_session)
 
     return PasswordRessetedResponse(
         message=f"New Credentials Created for {user.username}.")
 
 
-@router.post("/login")
-def login_for_access_token(
+async def create_user_access_token(
+        user: AuthUser, database_session: Session) -> str:
+    """Create the access token of an authenticated user."""
+
+    access_token_expires = timedelta(
+        minutes=jwt_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    customer_id = None
+
+    if jwt_settings.ACCESS_TOKEN_CLAIMS_ENABLED:
+        customer_id = await run_database_call(
+            customer_controller.get_customer_id, user.id, database_session)
+
+    return user_controller.create_access_token(
+        data=user_controller.get_access_token_claims(user, customer_id),
+        expires_delta=access_token_expires
+    )
+
+
+@router.post("/login", response_model_exclude_none=True)
+async def login_for_access_token(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        database_session: Session = Depends(get_session),
-        client_version: str = Header(...)) -> AuthTokenResponse:
+        request: Request,
+        database_session: Session = Depends(get_database_session)
+) -> AuthTokenResponse:
     """Authenticate with credentials and gets a valid auth token."""
 
-    version_controller.is_valid_version(client_version)
+    username = normalize_username(form_data.username)
+    client_ip = login_rate_limiter.get_client_ip(request)
 
-    user = user_controller.authenticate_user(
+    login_rate_limiter.check(username, client_ip)
+
+    user = await user_controller.authenticate_user(
         form_data.username, form_data.password, database_session)
 
     if not user:
@@ -104,12 +145,38 @@ def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"})
 
-    access_token_expires = timedelta(
-        minutes=jwt_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    login_rate_limiter.release(username, client_ip)
 
-    access_token = user_controller.create_access_token(
-        data={"sub": user.username},
-        expires_delta=access_token_expires
-    )
+    access_token = await create_user_access_token(user, database_session)
+    refresh_token = None
+
+    if jwt_settings.REFRESH_TOKENS_ENABLED:
+        refresh_token = await run_database_call(
+            user_controller.issue_refresh_token, user.id, database_session)
+
+    return AuthTokenResponse(
+        access_token=access_token, token_type="bearer",
+        refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model_exclude_none=True)
+async def refresh_access_token(
+        payload: RefreshTokenRequest,
+        database_session: Session = Depends(get_database_session)
+) -> AuthTokenResponse:
+    """Exchange a refresh token for a new access and refresh token."""
+
+    if not jwt_settings.REFRESH_TOKENS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Refresh tokens are not enabled.")
+
+    user, refresh_token = await run_database_call(
+        user_controller.rotate_refresh_token,
+        payload.refresh_token, database_session)
+
+    access_token = await create_user_access_token(user, database_session)
 
-    return AuthTokenResponse(access_token=access_token, token_type="bearer")
+    return AuthTokenResponse(
+        access_token=access_token, token_type="bearer",
+        refresh_token=refresh_token)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class RecoverPasswordRequest(BaseModel):
@@ -21,12 +23,24 @@ class AuthTokenResponse(BaseModel):
 
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshTokenRequest(BaseModel):
+    """Data class model that handles refresh token request."""
+
+    refresh_token: str = Field(min_length=1, max_length=128)
 
 
 class AuthTokenDataResponse(BaseModel):
     """Data class model that handles Auth Token response."""
 
     username: str | None = None
+    user_id: int | None = None
+    customer_id: UUID | None = None
+    credential_version: int | None = None
+    is_active: bool = False
+    is_superuser: bool = False
 
 
 class UserResponse(BaseModel):
@@ -36,6 +50,17 @@ class UserResponse(BaseModel):
     is_active: bool
 
 
+class AuthPrincipal(BaseModel):
+    """Data class model that handles the authenticated user identity."""
+
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+
 class PasswordCreatedResponse(BaseModel):
     """Data class model that handles Auth Token response."""
 
@@ -0,0 +1,221 @@
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jose import JWTError
+from jose import jwk as jose_jwk
+from jose import jwt as jose_jwt
+
+from app.config import JWTSettings, jwt_settings
+from app.utils.metrics import timed_section
+
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+
+class TokenError(JWTError):
+    """Exception raised for tokens that cannot be decoded or verified."""
+
+
+class TokenConfigurationError(ValueError):
+    """Exception raised for JWT settings a token service cannot use."""
+
+
+class JoseBackend:
+    """Token backend built on python-jose, keys are parsed into jwk keys."""
+
+    name = "jose"
+
+    def load_secret(self, secret: str, algorithm: str) -> Any:
+        return jose_jwk.construct(secret, algorithm)
+
+    def load_private_key(self, pem: bytes, algorithm: str) -> Any:
+        if algorithm == "EdDSA":
+            raise TokenConfigurationError(
+                "python-jose does not support EdDSA, use JWT_BACKEND=pyjwt.")
+
+        return jose_jwk.construct(pem, algorithm)
+
+    def load_public_key(self, pem: bytes, algorithm: str) -> Any:
+        return self.load_private_key(pem, algorithm)
+
+    def get_key_id(self, token: str) -> str | None:
+        try:
+            return jose_jwt.get_unverified_header(token).get("kid")
+        except JWTError as error:
+            raise TokenError(str(error))
+
+    def encode(
+            self, claims: dict, key: Any,
+            algorithm: str, key_id: str) -> str:
+        return jose_jwt.encode(
+            claims, key, algorithm=algorithm, headers={"kid": key_id})
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return jose_jwt.decode(token, key, algorithms=[algorithm])
+        except JWTError as error:
+            raise TokenError(str(error))
+
+
+class PyJWTBackend:
+    """Token backend built on PyJWT, keys are loaded with cryptography."""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        if pyjwt is None:
+            raise TokenConfigurationError(
+                "The pyjwt backend needs PyJWT installed.")
+
+    def load_secret(self, secret: str, algorithm: str) -> Any:
+        return secret.encode()
+
+    def load_private_key(self, pem: bytes, algorithm: str) -> Any:
+        return serialization.load_pem_private_key(pem, password=None)
+
+    def load_public_key(self, pem: bytes, algorithm: str) -> Any:
+        return serialization.load_pem_public_key(pem)
+
+    def get_key_id(self, token: str) -> str | None:
+        try:
+            return pyjwt.get_unverified_header(token).get("kid")
+        except pyjwt.PyJWTError as error:
+            raise TokenError(str(error))
+
+    def encode(
+            self, claims: dict, key: Any,
+            algorithm: str, key_id: str) -> str:
+        return pyjwt.encode(
+            claims, key, algorithm=algorithm, headers={"kid": key_id})
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return pyjwt.decode(token, key, algorithms=[algorithm])
+        except pyjwt.PyJWTError as error:
+            raise TokenError(str(error))
+
+
+TOKEN_BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+}
+
+
+class TokenService:
+    """Signs and verifies JWT tokens with keys parsed once.
+
+    Tokens are signed with the active key and carry its ``kid`` header.
+    Verification picks the key of the token ``kid`` among the active and
+    the retired keys, so keys can be rotated without invalidating tokens
+    that are still valid. Tokens without ``kid`` use the active key.
+    """
+
+    def __init__(
+            self, backend, algorithm: str, key_id: str,
+            signing_key: Any, verification_keys: dict[str, Any]):
+        self.backend = backend
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self.signing_key = signing_key
+        self.verification_keys = verification_keys
+
+    def encode(self, claims: dict) -> str:
+        """Return the signed token of a claims dictionary."""
+
+        with timed_section("jwt_encode"):
+            return self.backend.encode(
+                claims, self.signing_key, self.algorithm, self.key_id)
+
+    def decode(self, token: str) -> dict:
+        """Return the verified claims of a token or raise TokenError."""
+
+        with timed_section("jwt_decode"):
+            key_id = self.backend.get_key_id(token) or self.key_id
+            key = self.verification_keys.get(key_id)
+
+            if key is None:
+                raise TokenError(f"Unknown token key id '{key_id}'.")
+
+            return self.backend.decode(token, key, self.algorithm)
+
+
+def read_key_file(file_path: str) -> bytes:
+    """Return the content of a PEM key file."""
+
+    with open(file_path, 'rb') as key_file:
+        return key_file.read()
+
+
+def generate_key_pair(algorithm: str) -> tuple[bytes, bytes]:
+    """Return a new PEM private and public key pair for an algorithm."""
+
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048)
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    return private_pem, public_pem
+
+
+def create_token_service(token_settings: JWTSettings) -> TokenService:
+    """Build a token service from the settings, parsing every key once.
+
+    HS algorithms sign with SECRET_KEY and JWT_VERIFICATION_KEYS maps the
+    ``kid`` of retired keys to their secret. Asymmetric algorithms sign
+    with the private key in JWT_PRIVATE_KEY_PATH, verify with the public
+    key in JWT_PUBLIC_KEY_PATH, and JWT_VERIFICATION_KEYS maps the ``kid``
+    of retired keys to their public key file.
+    """
+
+    if token_settings.JWT_BACKEND not in TOKEN_BACKENDS:
+        raise TokenConfigurationError(
+            f"JWT_BACKEND must be one of {', '.join(TOKEN_BACKENDS)}, "
+            f"got {token_settings.JWT_BACKEND!r}.")
+
+    backend = TOKEN_BACKENDS[token_settings.JWT_BACKEND]()
+    algorithm = token_settings.ALGORITHM
+
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        for setting in ("JWT_PRIVATE_KEY_PATH", "JWT_PUBLIC_KEY_PATH"):
+            if not getattr(token_settings, setting):
+                raise TokenConfigurationError(
+                    f"{setting} must be set for the {algorithm} algorithm.")
+
+        signing_key = backend.load_private_key(
+            read_key_file(token_settings.JWT_PRIVATE_KEY_PATH), algorithm)
+        verification_keys = {
+            key_id: backend.load_public_key(read_key_file(path), algorithm)
+            for key_id, path in token_settings.JWT_VERIFICATION_KEYS.items()
+        }
+        public_key = backend.load_public_key(
+            read_key_file(token_settings.JWT_PUBLIC_KEY_PATH), algorithm)
+        verification_keys[token_settings.JWT_KEY_ID] = public_key
+    else:
+        signing_key = backend.load_secret(token_settings.SECRET_KEY, algorithm)
+        verification_keys = {
+            key_id: backend.load_secret(secret, algorithm)
+            for key_id, secret in token_settings.JWT_VERIFICATION_KEYS.items()
+        }
+        verification_keys[token_settings.JWT_KEY_ID] = signing_key
+
+    return TokenService(
+        backend, algorithm, token_settings.JWT_KEY_ID,
+        signing_key, verification_keys)
+
+
+token_service = create_token_service(jwt_settings)
@@ -0,0 +1,219 @@
+import time
+import asyncio
+import threading
+
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import engine
+from app.utils.bloom import BloomFilter
+from app.utils.logger import logger_config
+from app.api.auth.models import AuthUser, normalize_username
+
+
+logger = logger_config(__name__)
+
+MEMBERSHIP_COLUMNS = {
+    "username": AuthUser.username,
+}
+
+# Users are caught up from a few ids below the highest one already seen, so
+# rows whose id was allocated before a build but committed after it are not
+# missed.
+CATCH_UP_ID_SLACK = 100
+
+
+class MembershipFilter:
+    """Bloom filters of the usernames in the database.
+
+    Values go through normalize_username on both sides, so a miss means
+    the username is not stored in any casing and the database lookup can
+    be skipped. Until the filters are built, or when they are disabled,
+    every value is reported as present.
+
+    Users written by other processes, like other API workers, are missing
+    until the next periodic rebuild. Callers check a miss against the users
+    whose id is above get_catch_up_id() and add them with catch_up() before
+    trusting it, so a stored user is never reported as absent. Values added
+    while a rebuild runs are replayed into the new filters before they
+    replace the old ones. Rebuilds requested through the API are spaced by
+    cooldown_seconds.
+    """
+
+    def __init__(
+            self, enabled: bool, error_rate: float,
+            min_capacity: int, refresh_seconds: float,
+            cooldown_seconds: float = 0):
+        self.enabled = enabled
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.refresh_seconds = refresh_seconds
+        self.cooldown_seconds = cooldown_seconds
+
+        self.filters: dict[str, BloomFilter] | None = None
+        self._pending: list[tuple[str, str]] | None = None
+        self._lock = threading.Lock()
+        self._requested_at: float | None = None
+        self.last_id: int = 0
+
+        self.skipped: int = 0
+        self.caught_up: int = 0
+        self.false_positives: int = 0
+
+    def build_filter(self, connection, kind: str) -> BloomFilter:
+        """Stream a column from the database into a new Bloom filter."""
+
+        column = MEMBERSHIP_COLUMNS[kind]
+        count = connection.execute(select(func.count(column))).scalar_one()
+        bloom_filter = BloomFilter(
+            max(self.min_capacity, count * 2), self.error_rate)
+
+        result = connection.execution_options(yield_per=10000).execute(
+            select(column))
+
+        for value in result.scalars():
+            bloom_filter.add(normalize_username(value))
+
+        return bloom_filter
+
+    def build(self) -> None:
+        """Build the filters from the database and swap them in."""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._pending = []
+
+        try:
+            with engine.connect() as connection:
+                last_id = connection.execute(
+                    select(func.max(AuthUser.id))).scalar() or 0
+                filters = {
+                    kind: self.build_filter(connection, kind)
+                    for kind in MEMBERSHIP_COLUMNS
+                }
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for kind, value in self._pending:
+                filters[kind].add(value)
+
+            self._pending = None
+            self.filters = filters
+            self.last_id = max(self.last_id, last_id)
+
+        logger.info("membership filter: %s", self.stats())
+
+    def request_build(self) -> float:
+        """Build the filters unless a build was requested within the cooldown.
+
+        Return 0 once built, or the seconds to wait before the next build.
+        """
+
+        now = time.monotonic()
+
+        with self._lock:
+            if self._requested_at is not None:
+                retry_after = (
+                    self._requested_at + self.cooldown_seconds - now)
+
+                if retry_after > 0:
+                    return retry_after
+
+            self._requested_at = now
+
+        self.build()
+
+        return 0
+
+    async def refresh_periodically(self) -> None:
+        """Rebuild the filters every refresh_seconds."""
+
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+
+            try:
+                await run_in_threadpool(self.build)
+            except Exception as error:
+                logger.error("membership filter refresh failed: %s", error)
+
+    def add(self, kind: str, value: str) -> None:
+        """Add a value written to the database by this process."""
+
+        value = normalize_username(value)
+
+        with self._lock:
+            if self.filters is not None:
+                self.filters[kind].add(value)
+
+            if self._pending is not None:
+                self._pending.append((kind, value))
+
+    def get_catch_up_id(self) -> int:
+        """Return the id above which users may be missing from the filters."""
+
+        return max(0, self.last_id - CATCH_UP_ID_SLACK)
+
+    def catch_up(self, users: list[tuple[int, str]]) -> None:
+        """Add users stored since the last build, given as id and username."""
+
+        for user_id, username in users:
+            self.add("username", username)
+            self.last_id = max(self.last_id, user_id)
+
+        self.caught_up += 1
+
+    def contains(self, kind: str, value: str) -> bool:
+        """Return whether the value may be stored, without counting it."""
+
+        filters = self.filters
+
+        return filters is None or normalize_username(value) in filters[kind]
+
+    def might_contain(self, kind: str, value: str) -> bool:
+        """Return False only when the value is certainly not stored."""
+
+        if self.contains(kind, value):
+            return True
+
+        self.skipped += 1
+
+        return False
+
+    def record_false_positive(self) -> None:
+        """Count a database lookup the filter let through that found nothing."""
+
+        if self.filters is not None:
+            self.false_positives += 1
+
+    def stats(self) -> dict:
+        """Return the footprint, expected error and counters of the filters."""
+
+        filters = self.filters or {}
+
+        return {
+            "enabled": self.enabled,
+            "ready": self.filters is not None,
+            "skipped": self.skipped,
+            "caught_up": self.caught_up,
+            "last_id": self.last_id,
+            "false_positives": self.false_positives,
+            "filters": {
+                kind: bloom_filter.stats()
+                for kind, bloom_filter in filters.items()
+            },
+        }
+
+
+membership_filter = MembershipFilter(
+    enabled=settings.MEMBERSHIP_FILTER_ENABLED,
+    error_rate=settings.MEMBERSHIP_FILTER_ERROR_RATE,
+    min_capacity=settings.MEMBERSHIP_FILTER_MIN_CAPACITY,
+    refresh_seconds=settings.MEMBERSHIP_FILTER_REFRESH_SECONDS,
+    cooldown_seconds=settings.MEMBERSHIP_FILTER_REFRESH_COOLDOWN_SECONDS,
+)
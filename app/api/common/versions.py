@@ -1,36 +1,178 @@
+from functools import lru_cache
+
 from packaging import version
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Header, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+
+MIN_CLIENT_VERSION = settings.MIN_CLIENT_VERSION
+
+CLIENT_VERSION_HEADER = b"client-version"
+
+
+class VersionConfigurationError(ValueError):
+    """Exception raised for configured minimum versions that are not valid."""
+
+
+@lru_cache(maxsize=settings.CLIENT_VERSION_CACHE_SIZE)
+def parse_client_version(version_header: str) -> version.Version | None:
+    """Parse a version header, invalid values are memoized as None."""
+
+    try:
+        return version.parse(version_header)
+    except version.InvalidVersion:
+        return None
+
+
+def client_version_header(client_version: str = Header(...)) -> str:
+    """Documents the client-version header in the OpenAPI schema.
 
+    The header is enforced by ClientVersionMiddleware before the request
+    reaches the routes.
+    """
 
-MIN_CLIENT_VERSION = "2.1.0"
+    return client_version
 
 
 class VersionConstroller:
     """Controller class that handles version in the headers."""
 
+    def __init__(self, minimum_versions: dict[str, str] | None = None):
+        if minimum_versions is None:
+            minimum_versions = {
+                prefix: MIN_CLIENT_VERSION
+                for prefix in settings.CLIENT_VERSION_PREFIXES
+            }
+            minimum_versions.update(settings.CLIENT_VERSION_POLICY)
+
+        self.minimum_versions = sorted(
+            (
+                (prefix.rstrip("/"), minimum)
+                for prefix, minimum in minimum_versions.items()
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        self.parsed_minimum_versions = {
+            minimum: self.parse_minimum_version(minimum)
+            for minimum in [MIN_CLIENT_VERSION, *minimum_versions.values()]
+        }
+
+    def parse_minimum_version(self, minimum_version: str) -> version.Version:
+        """Parse a configured minimum version or raise a config error."""
+
+        parsed_version = parse_client_version(minimum_version)
+
+        if parsed_version is None:
+            raise VersionConfigurationError(
+                f"Minimum client version '{minimum_version}' is not valid, "
+                "check MIN_CLIENT_VERSION and CLIENT_VERSION_POLICY.")
+
+        return parsed_version
+
+    def get_minimum_version(self, path: str) -> str | None:
+        """Return the minimum version of the longest matching path prefix."""
+
+        for prefix, minimum_version in self.minimum_versions:
+            if path == prefix or path.startswith(prefix + "/"):
+                return minimum_version
+
+        return None
+
+    def get_version_error(
+            self, version_header: str | None,
+            minimum_version: str = MIN_CLIENT_VERSION) -> str | None:
+        """Return the validation error of a version header, if any."""
+
+        if version_header is None:
+            return "Header client-version is required."
+
+        parsed_version = parse_client_version(version_header)
+
+        if parsed_version is None:
+            return f"Header app-version '{version_header}' is not valid."
+
+        parsed_minimum = self.parsed_minimum_versions.get(minimum_version)
+
+        if parsed_minimum is None:
+            parsed_minimum = self.parse_minimum_version(minimum_version)
+
+        if not parsed_minimum <= parsed_version:
+            validation_error = "Header app-version '{}' is lower than {}."
+
+            return validation_error.format(parsed_version, minimum_version)
+
+        return None
+
     def get_parsed_version_format(self, version_header: str) -> version.Version:
         """Check if string in header is a valid version format."""
 
-        try:
-            return version.parse(version_header)
-        except version.InvalidVersion:
+        parsed_version = parse_client_version(version_header)
 
+        if parsed_version is None:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=f"Header app-version '{version_header}' is not valid."
             )
 
-    def is_valid_version(self, version_header: str):
-        """Check if valid version is lower or equal than version in the input."""
+        return parsed_version
 
-        version_header = self.get_parsed_version_format(version_header)
+    def is_valid_version(
+            self, version_header: str,
+            minimum_version: str = MIN_CLIENT_VERSION):
+        """Check if valid version is lower or equal than version in the input."""
 
-        if not version.parse(MIN_CLIENT_VERSION) <= version_header:
-            validation_error = "Header app-version '{}' is lower than {}."
+        validation_error = self.get_version_error(
+            version_header, minimum_version)
 
+        if validation_error:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=validation_error.format(
-                    version_header, MIN_CLIENT_VERSION)
+                detail=validation_error
             )
+
+
+class ClientVersionMiddleware:
+    """ASGI middleware that rejects missing or outdated client versions.
+
+    The check runs before routing, so rejected requests never reach body
+    parsing, authentication or the database.
+    """
+
+    def __init__(
+            self, app: ASGIApp,
+            version_controller: VersionConstroller | None = None):
+        self.app = app
+        self.version_controller = version_controller or VersionConstroller()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        minimum_version = self.version_controller.get_minimum_version(
+            scope["path"])
+
+        if minimum_version is None:
+            return await self.app(scope, receive, send)
+
+        version_header = None
+        for name, value in scope["headers"]:
+            if name == CLIENT_VERSION_HEADER:
+                version_header = value.decode("latin-1")
+                break
+
+        validation_error = self.version_controller.get_version_error(
+            version_header, minimum_version)
+
+        if validation_error:
+            response = JSONResponse(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                content={"detail": validation_error})
+
+            return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
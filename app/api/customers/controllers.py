@@ -1,21 +1,127 @@
-from sqlmodel import Session, select
-from fastapi import HTTPException, status
+import sys
+from typing import Annotated, NamedTuple
+from uuid import UUID
 
+from sqlmodel import Session, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import Depends, HTTPException, status
+
+from app.config import settings
+from app.database import get_async_session, get_session
+from app.utils.cache import TTLCache
 from app.utils.logger import logger_config
 
 from app.api.auth.models import AuthUser
+from app.api.auth.schemas import AuthTokenDataResponse
+from app.api.auth.controllers import (
+    AsyncUserController,
+    UserController,
+    normalize_username,
+    oauth2_scheme,
+    principal_cache
+)
 from app.api.common.exceptions import CustomerUpdateError
 
-from app.api.customers.schemas import CustomerUpdate
+from app.api.customers.schemas import CustomerResponse, CustomerUpdate
 from app.api.customers.models import Customer
 
 
 logger = logger_config(__name__)
 
+user_controller = UserController()
+
+async_user_controller = AsyncUserController()
+
+
+class CustomerProfile(NamedTuple):
+    """Serialized profile of a customer and the ETag of its version."""
+
+    etag: str
+    payload: bytes
+    version: int = 0
+
+
+def get_profile_size(profile: CustomerProfile) -> int:
+    """Return the memory held by a cached profile."""
+
+    return sys.getsizeof(profile.etag) + sys.getsizeof(profile.payload)
+
+
+def parse_etags(header: str) -> list[str]:
+    """Return the entity tags listed in an If-Match or If-None-Match header."""
+
+    return [etag.strip() for etag in header.split(",") if etag.strip()]
+
+
+customer_profile_cache = TTLCache(
+    maxsize=settings.CUSTOMER_PROFILE_CACHE_MAXSIZE,
+    ttl=settings.CUSTOMER_PROFILE_CACHE_TTL_SECONDS,
+    sizeof=get_profile_size)
+
 
 class CustomerController:
     """Constroller class that handles Customer logic with the database."""
 
+    def get_customer_not_found_exception(self, email: str) -> HTTPException:
+        """Method that returns the error for a missing customer."""
+
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Customer not found with email: {email}")
+
+    def get_precondition_failed_exception(self) -> HTTPException:
+        """Method that returns the error for a stale If-Match header."""
+
+        return HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Customer was modified, fetch it again before updating.")
+
+    def get_customer_etag(self, customer: Customer) -> str:
+        """Method that returns the strong ETag of a customer version."""
+
+        return f'"{customer.customer_id}-{customer.version}"'
+
+    def is_etag_listed(self, etag: str, header: str | None) -> bool:
+        """Method that checks an ETag against an If-None-Match header."""
+
+        if header is None:
+            return False
+
+        etags = parse_etags(header)
+
+        return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+    def check_if_match(
+            self, customer: Customer, if_match: str | None) -> None:
+        """Method that rejects updates of a version the client has not seen.
+
+        If-Match compares strong ETags only, weak ones never match.
+        """
+
+        if if_match is None:
+            return
+
+        etags = parse_etags(if_match)
+
+        if "*" not in etags and self.get_customer_etag(customer) not in etags:
+            raise self.get_precondition_failed_exception()
+
+    def get_update_customer_statement(
+            self, customer: Customer, if_match: str | None):
+        """Method that updates a customer and bumps its version.
+
+        With If-Match the update only applies to the version that was
+        checked, so a concurrent update in between makes it fail.
+        """
+
+        statement = update(Customer).where(
+            Customer.customer_id == customer.customer_id)
+
+        if if_match is not None:
+            statement = statement.where(Customer.version == customer.version)
+
+        return statement.values(version=Customer.version + 1)
+
     def get_customer_profile(
             self, email: str, database_session: Session) -> Customer:
         """Method that gets the profile from the authenticated user."""
@@ -26,18 +132,163 @@ class CustomerController:
         customer = results.first()
 
         if not customer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Customer not found with email: {email}")
+            raise self.get_customer_not_found_exception(email)
 
         return customer
 
-    def activate_customer_account(
-            self, user: AuthUser, customer: Customer,
+    def get_customer_id(
+            self, user_id: int, database_session: Session) -> UUID | None:
+        """Method that returns the id of the customer linked to a user."""
+
+        return database_session.exec(
+            select(Customer.customer_id).where(Customer.user == user_id)
+        ).first()
+
+    def get_user_customer_statement(self, username: str):
+        """Method that selects an AuthUser joined with its Customer."""
+
+        return (
+            select(AuthUser, Customer)
+            .outerjoin(Customer, Customer.user == AuthUser.id)
+            .where(
+                func.lower(AuthUser.username) == normalize_username(username))
+        )
+
+    def get_customer_from_row(self, row: tuple | None) -> Customer:
+        """Method that validates a joined AuthUser and Customer row."""
+
+        if row is None:
+            raise user_controller.get_credentials_exception()
+
+        user, customer = row
+        user_controller.cache_principal(user)
+
+        if not customer:
+            raise self.get_customer_not_found_exception(user.username)
+
+        return customer
+
+    def get_authenticated_customer(
+            self, token: Annotated[str, Depends(oauth2_scheme)],
+            database_session: Session = Depends(get_session)) -> Customer:
+        """Method that loads the authenticated user and its customer at once.
+
+        The AuthUser and the Customer linked through ``Customer.user`` come
+        back from a single joined query instead of one query each. Tokens
+        with trusted claims load the Customer by its primary key alone.
+        """
+
+        return self.load_authenticated_customer(
+            user_controller.get_token_data(token), database_session)
+
+    def load_authenticated_customer(
+            self, token_data: AuthTokenDataResponse,
             database_session: Session) -> Customer:
-        """Method that activates a customer account."""
+        """Method that loads the customer of already decoded token data."""
 
-        customer.user = user.id
+        if (user_controller.has_trusted_claims(token_data)
+                and token_data.customer_id is not None):
+            user_controller.check_credential_version(
+                token_data, database_session)
+
+            customer = database_session.get(Customer, token_data.customer_id)
+
+            if customer is None:
+                raise self.get_customer_not_found_exception(
+                    token_data.username)
+
+            return customer
+
+        statement = self.get_user_customer_statement(token_data.username)
+        row = database_session.exec(statement).first()
+
+        return self.get_customer_from_row(row)
+
+    def get_known_user_id(
+            self, token_data: AuthTokenDataResponse) -> int | None:
+        """Method that returns the user id of a token without a query."""
+
+        if user_controller.has_trusted_claims(token_data):
+            return token_data.user_id
+
+        principal = principal_cache.get(
+            normalize_username(token_data.username))
+
+        return principal.id if principal is not None else None
+
+    def get_cached_customer_profile(
+            self, token_data: AuthTokenDataResponse) -> CustomerProfile | None:
+        """Method that returns the cached profile of the token user."""
+
+        user_id = self.get_known_user_id(token_data)
+
+        if user_id is None:
+            return None
+
+        return customer_profile_cache.get(user_id)
+
+    def get_customer_version_statement(self, user_id: int):
+        """Method that returns the statement for the version of a user."""
+
+        return select(Customer.version).where(Customer.user == user_id)
+
+    def is_cached_profile_current(
+            self, token_data: AuthTokenDataResponse, profile: CustomerProfile,
+            database_session: Session) -> bool:
+        """Method that checks a cached profile against the stored version."""
+
+        if not settings.CUSTOMER_PROFILE_CACHE_VALIDATE:
+            return True
+
+        statement = self.get_customer_version_statement(
+            self.get_known_user_id(token_data))
+
+        return database_session.exec(statement).first() == profile.version
+
+    def cache_customer_profile(self, customer: Customer) -> CustomerProfile:
+        """Method that serializes a profile and caches it by its user."""
+
+        profile = CustomerProfile(
+            etag=self.get_customer_etag(customer),
+            payload=CustomerResponse(
+                **customer.columns_to_dict()).model_dump_json().encode(),
+            version=customer.version)
+
+        if customer.user is not None:
+            customer_profile_cache.set(customer.user, profile)
+
+        return profile
+
+    def get_authenticated_profile(
+            self, token: str, database_session: Session) -> CustomerProfile:
+        """Method that returns the serialized profile of the current user.
+
+        Profiles are cached by user id. When the user is known from trusted
+        claims or from the principal cache, a cached profile whose version
+        still matches the stored one is served without loading the customer,
+        otherwise it is loaded and cached.
+        """
+
+        token_data = user_controller.get_token_data(token)
+        profile = self.get_cached_customer_profile(token_data)
+
+        if profile is not None:
+            if user_controller.has_trusted_claims(token_data):
+                user_controller.check_credential_version(
+                    token_data, database_session)
+
+            if self.is_cached_profile_current(
+                    token_data, profile, database_session):
+                return profile
+
+        customer = self.load_authenticated_customer(
+            token_data, database_session)
+
+        return self.cache_customer_profile(customer)
+
+    def save_customer(
+            self, customer: Customer, database_session: Session) -> Customer:
+        """Method that persists a Customer instance into the database."""
 
         try:
             database_session.add(customer)
@@ -53,17 +304,146 @@ class CustomerController:
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database service error, transactions will Rollback.")
 
+    def activate_customer_account(
+            self, user: AuthUser, customer: Customer,
+            database_session: Session) -> Customer:
+        """Method that activates a customer account."""
+
+        customer.user = user.id
+
+        customer = self.save_customer(customer, database_session)
+        self.cache_customer_profile(customer)
+
+        return customer
+
     def update_customer_data(
             self, update_request: CustomerUpdate,
-            customer: Customer, database_session: Session) -> Customer:
-        """Method that updates customer data."""
+            customer: Customer, database_session: Session,
+            if_match: str | None = None) -> Customer:
+        """Method that updates customer data and bumps its version."""
+
+        self.check_if_match(customer, if_match)
+
+        result = database_session.exec(
+            self.get_update_customer_statement(customer, if_match).values(
+                language=update_request.language))
+
+        if result.rowcount != 1:
+            database_session.rollback()
+
+            raise self.get_precondition_failed_exception()
+
+        database_session.commit()
+        database_session.refresh(customer)
+        self.cache_customer_profile(customer)
+
+        return customer
+
+
+class AsyncCustomerController(CustomerController):
+    """Constroller class that handles Customer with an async database session."""
+
+    async def get_customer_profile(
+            self, email: str, database_session: AsyncSession) -> Customer:
+        """Method that gets the profile from the authenticated user."""
+
+        results = await database_session.exec(
+            select(Customer).where(Customer.email == email))
+
+        customer = results.first()
+
+        if not customer:
+            raise self.get_customer_not_found_exception(email)
+
+        return customer
+
+    async def get_customer_id(
+            self, user_id: int,
+            database_session: AsyncSession) -> UUID | None:
+        """Method that returns the id of the customer linked to a user."""
+
+        return (await database_session.exec(
+            select(Customer.customer_id).where(Customer.user == user_id)
+        )).first()
+
+    async def get_authenticated_customer(
+            self, token: Annotated[str, Depends(oauth2_scheme)],
+            database_session: AsyncSession = Depends(get_async_session)
+    ) -> Customer:
+        """Method that loads the authenticated user and its customer at once."""
 
-        customer.language = update_request.language
+        return await self.load_authenticated_customer(
+            user_controller.get_token_data(token), database_session)
+
+    async def load_authenticated_customer(
+            self, token_data: AuthTokenDataResponse,
+            database_session: AsyncSession) -> Customer:
+        """Method that loads the customer of already decoded token data."""
+
+        if (user_controller.has_trusted_claims(token_data)
+                and token_data.customer_id is not None):
+            await async_user_controller.check_credential_version(
+                token_data, database_session)
+
+            customer = await database_session.get(
+                Customer, token_data.customer_id)
+
+            if customer is None:
+                raise self.get_customer_not_found_exception(
+                    token_data.username)
+
+            return customer
+
+        statement = self.get_user_customer_statement(token_data.username)
+        row = (await database_session.exec(statement)).first()
+
+        return self.get_customer_from_row(row)
+
+    async def is_cached_profile_current(
+            self, token_data: AuthTokenDataResponse, profile: CustomerProfile,
+            database_session: AsyncSession) -> bool:
+        """Method that checks a cached profile against the stored version."""
+
+        if not settings.CUSTOMER_PROFILE_CACHE_VALIDATE:
+            return True
+
+        statement = self.get_customer_version_statement(
+            self.get_known_user_id(token_data))
+
+        return (await database_session.exec(statement)).first() == (
+            profile.version)
+
+    async def get_authenticated_profile(
+            self, token: str,
+            database_session: AsyncSession) -> CustomerProfile:
+        """Method that returns the serialized profile of the current user."""
+
+        token_data = user_controller.get_token_data(token)
+        profile = self.get_cached_customer_profile(token_data)
+
+        if profile is not None:
+            if user_controller.has_trusted_claims(token_data):
+                await async_user_controller.check_credential_version(
+                    token_data, database_session)
+
+            if await self.is_cached_profile_current(
+                    token_data, profile, database_session):
+                return profile
+
+        customer = await self.load_authenticated_customer(
+            token_data, database_session)
+
+        return self.cache_customer_profile(customer)
+
+    async def save_customer(
+            self, customer: Customer,
+            database_session: AsyncSession) -> Customer:
+        """Method that persists a Customer instance into the database."""
 
         try:
             database_session.add(customer)
-            database_session.commit()
-            database_session.refresh(customer)
+            await database_session.commit()
+            await database_session.refresh(customer)
 
             return customer
 
@@ -73,3 +453,38 @@ class CustomerController:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database service error, transactions will Rollback.")
+
+    async def activate_customer_account(
+            self, user: AuthUser, customer: Customer,
+            database_session: AsyncSession) -> Customer:
+        """Method that activates a customer account."""
+
+        customer.user = user.id
+
+        customer = await self.save_customer(customer, database_session)
+        self.cache_customer_profile(customer)
+
+        return customer
+
+    async def update_customer_data(
+            self, update_request: CustomerUpdate,
+            customer: Customer, database_session: AsyncSession,
+            if_match: str | None = None) -> Customer:
+        """Method that updates customer data and bumps its version."""
+
+        self.check_if_match(customer, if_match)
+
+        result = await database_session.exec(
+            self.get_update_customer_statement(customer, if_match).values(
+                language=update_request.language))
+
+        if result.rowcount != 1:
+            await database_session.rollback()
+
+            raise self.get_precondition_failed_exception()
+
+        await database_session.commit()
+        await database_session.refresh(customer)
+        self.cache_customer_profile(customer)
+
+        return customer
@@ -17,7 +17,9 @@ class Customer(SQLModel, table=True):
     country: str
     language: LanguageChoices = Field(default=None, nullable=True)
     user: Optional[int] = Field(
-        foreign_key="authuser.id", default=None, nullable=True)
+        foreign_key="authuser.id", default=None, nullable=True, index=True)
+    version: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
 
     def columns_to_dict(self):
         dict_ = {}
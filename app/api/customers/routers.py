@@ -1,56 +1,81 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Response, status
 from sqlmodel import Session
 
-from app.database import get_session
-
-from app.api.auth.models import AuthUser
-from app.api.auth.controllers import UserController
-from app.api.common.versions import VersionConstroller
+from app.config import settings
+from app.database import get_database_session, run_database_call
 
+from app.api.auth.controllers import oauth2_scheme
+from app.api.customers.models import Customer
 from app.api.customers.schemas import CustomerResponse, CustomerUpdate
-from app.api.customers.controllers import CustomerController
+from app.api.customers.controllers import (
+    AsyncCustomerController,
+    CustomerController
+)
 
 
 router = APIRouter()
-user_controller = UserController()
-customer_controller = CustomerController()
-version_controller = VersionConstroller()
-
-annotated_auth_user = Annotated[AuthUser, Depends(
-    user_controller.get_current_user)]
-
-
-@router.get("/me", response_model=CustomerResponse)
-def get_authenticated_customer(
-        authenticated_user: annotated_auth_user,
-        database_session: Session = Depends(get_session),
-        client_version: str = Header(...)) -> CustomerResponse:
-    """Retrieve Customer profile from the authenticated user."""
-
-    version_controller.is_valid_version(client_version)
-
-    customer = customer_controller.get_customer_profile(
-        authenticated_user.username, database_session)
 
-    return CustomerResponse(**customer.columns_to_dict())
-
-
-@router.put("/me/edit-data", response_model=CustomerResponse)
-def update_authenticated_customer(
+if settings.ASYNC_DATABASE:
+    customer_controller = AsyncCustomerController()
+else:
+    customer_controller = CustomerController()
+
+annotated_customer = Annotated[Customer, Depends(
+    customer_controller.get_authenticated_customer)]
+
+
+@router.get(
+    "/me", response_model=CustomerResponse,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified"}})
+async def get_authenticated_customer(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        database_session: Session = Depends(get_database_session),
+        if_none_match: Annotated[str | None, Header()] = None
+) -> Response:
+    """Retrieve Customer profile from the authenticated user.
+
+    Clients sending the ETag they hold in If-None-Match get an empty 304
+    while the profile has not changed.
+    """
+
+    profile = await run_database_call(
+        customer_controller.get_authenticated_profile,
+        token, database_session)
+    headers = {"ETag": profile.etag}
+
+    if customer_controller.is_etag_listed(profile.etag, if_none_match):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=profile.payload, media_type="application/json",
+        headers=headers)
+
+
+@router.put(
+    "/me/edit-data", response_model=CustomerResponse,
+    responses={
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "If-Match does not match the current ETag"}})
+async def update_authenticated_customer(
         update_request: CustomerUpdate,
-        authenticated_user: annotated_auth_user,
-        database_session: Session = Depends(get_session),
-        client_version: str = Header(...)):
-    """Retrieve all bank accounts from the database."""
-
-    version_controller.is_valid_version(client_version)
-
-    customer = customer_controller.get_customer_profile(
-        authenticated_user.username, database_session)
-
-    customer_to_update = customer_controller.update_customer_data(
-        update_request, customer, database_session)
+        customer: annotated_customer,
+        response: Response,
+        database_session: Session = Depends(get_database_session),
+        if_match: Annotated[str | None, Header()] = None):
+    """Update the authenticated Customer, optionally only if unchanged.
+
+    The new ETag is returned, sending it back in If-Match makes the next
+    update fail with 412 if the customer was modified meanwhile.
+    """
+
+    customer_to_update = await run_database_call(
+        customer_controller.update_customer_data,
+        update_request, customer, database_session, if_match)
+
+    response.headers["ETag"] = customer_controller.get_customer_etag(
+        customer_to_update)
 
     return CustomerResponse(**customer_to_update.columns_to_dict())
@@ -0,0 +1,85 @@
+import math
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import get_pool_statistics
+from app.api.auth.limits import login_rate_limiter
+from app.api.common.membership import membership_filter
+from app.api.customers.controllers import customer_profile_cache
+from app.utils.metrics import metrics
+
+
+def internal_token_header(
+        x_internal_token: Annotated[str | None, Header()] = None) -> None:
+    """Allow only callers sending the shared INTERNAL_API_TOKEN.
+
+    The internal endpoints are closed when no token is configured.
+    """
+
+    expected = settings.INTERNAL_API_TOKEN
+
+    if (not expected or x_internal_token is None
+            or not secrets.compare_digest(x_internal_token, expected)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid x-internal-token header is required.")
+
+
+router = APIRouter(dependencies=[Depends(internal_token_header)])
+
+metrics_router = APIRouter(dependencies=[Depends(internal_token_header)])
+
+
+@router.get("/pool-stats")
+async def get_database_pool_statistics() -> dict:
+    """Retrieve live statistics of the database connection pools."""
+
+    return get_pool_statistics()
+
+
+@router.get("/rate-limits")
+async def get_login_rate_limit_statistics() -> dict:
+    """Retrieve the allowed and shed login attempts."""
+
+    return login_rate_limiter.stats()
+
+
+@router.get("/membership-filter")
+async def get_membership_filter_statistics() -> dict:
+    """Retrieve the footprint and error rate of the membership filters."""
+
+    return membership_filter.stats()
+
+
+@router.post("/membership-filter/refresh")
+async def refresh_membership_filter() -> dict:
+    """Rebuild the membership filters, at most once per cooldown."""
+
+    retry_after = await run_in_threadpool(membership_filter.request_build)
+
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="The membership filter was rebuilt recently.",
+            headers={"Retry-After": str(math.ceil(retry_after))})
+
+    return membership_filter.stats()
+
+
+@router.get("/customer-profile-cache")
+async def get_customer_profile_cache_statistics() -> dict:
+    """Retrieve the hit ratio and memory use of the customer profile cache."""
+
+    return customer_profile_cache.stats()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """Expose request and section metrics in the Prometheus text format."""
+
+    return metrics.render()
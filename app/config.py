@@ -10,6 +10,61 @@ class JWTSettings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
     FIXED_RECOVERY_CODE: int = os.getenv("FIXED_RECOVERY_CODE")
+    TOKEN_CACHE_MAXSIZE: int = os.getenv("TOKEN_CACHE_MAXSIZE", 10000)
+    TOKEN_CACHE_TTL_SECONDS: int = os.getenv("TOKEN_CACHE_TTL_SECONDS", 300)
+    PRINCIPAL_CACHE_MAXSIZE: int = os.getenv("PRINCIPAL_CACHE_MAXSIZE", 10000)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = os.getenv(
+        "PRINCIPAL_CACHE_TTL_SECONDS", 60)
+    ACCESS_TOKEN_CLAIMS_ENABLED: bool = os.getenv(
+        "ACCESS_TOKEN_CLAIMS_ENABLED", False)
+    CREDENTIAL_VERSION_CACHE_MAXSIZE: int = os.getenv(
+        "CREDENTIAL_VERSION_CACHE_MAXSIZE", 10000)
+    CREDENTIAL_VERSION_CACHE_TTL_SECONDS: int = os.getenv(
+        "CREDENTIAL_VERSION_CACHE_TTL_SECONDS", 5)
+    REFRESH_TOKENS_ENABLED: bool = os.getenv("REFRESH_TOKENS_ENABLED", False)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30)
+    REFRESH_TOKEN_PRUNE_SECONDS: float = os.getenv(
+        "REFRESH_TOKEN_PRUNE_SECONDS", 3600)
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "jose")
+    JWT_KEY_ID: str = os.getenv("JWT_KEY_ID", "default")
+    JWT_PRIVATE_KEY_PATH: str | None = os.getenv("JWT_PRIVATE_KEY_PATH")
+    JWT_PUBLIC_KEY_PATH: str | None = os.getenv("JWT_PUBLIC_KEY_PATH")
+    JWT_VERIFICATION_KEYS: dict[str, str] = {}
+
+    class Config:
+        case_sensitive = True
+
+
+class HashingSettings(BaseSettings):
+    """Implements Settings for the password hashing worker pool."""
+
+    HASHING_POOL_ENABLED: bool = os.getenv("HASHING_POOL_ENABLED", False)
+    HASHING_POOL_EXECUTOR: str = os.getenv("HASHING_POOL_EXECUTOR", "thread")
+    HASHING_POOL_MAX_WORKERS: int = os.getenv("HASHING_POOL_MAX_WORKERS", 2)
+    HASHING_POOL_QUEUE_DEPTH: int = os.getenv("HASHING_POOL_QUEUE_DEPTH", 16)
+    BCRYPT_ROUNDS: int | None = os.getenv("BCRYPT_ROUNDS")
+    BCRYPT_CALIBRATE: bool = os.getenv("BCRYPT_CALIBRATE", False)
+    BCRYPT_TARGET_MS: float = os.getenv("BCRYPT_TARGET_MS", 250)
+    BCRYPT_MIN_ROUNDS: int = os.getenv("BCRYPT_MIN_ROUNDS", 10)
+    BCRYPT_MAX_ROUNDS: int = os.getenv("BCRYPT_MAX_ROUNDS", 16)
+
+    class Config:
+        case_sensitive = True
+
+
+class LoginRateLimitSettings(BaseSettings):
+    """Implements Settings for the login admission control."""
+
+    LOGIN_RATE_LIMIT_ENABLED: bool = os.getenv("LOGIN_RATE_LIMIT_ENABLED", True)
+    LOGIN_USERNAME_BURST: int = os.getenv("LOGIN_USERNAME_BURST", 5)
+    LOGIN_USERNAME_PER_MINUTE: float = os.getenv(
+        "LOGIN_USERNAME_PER_MINUTE", 5)
+    LOGIN_IP_BURST: int = os.getenv("LOGIN_IP_BURST", 50)
+    LOGIN_IP_PER_MINUTE: float = os.getenv("LOGIN_IP_PER_MINUTE", 50)
+    LOGIN_RATE_LIMIT_SHARDS: int = os.getenv("LOGIN_RATE_LIMIT_SHARDS", 16)
+    LOGIN_RATE_LIMIT_SWEEP_SECONDS: float = os.getenv(
+        "LOGIN_RATE_LIMIT_SWEEP_SECONDS", 60)
+    LOGIN_TRUSTED_PROXIES: str = os.getenv("LOGIN_TRUSTED_PROXIES", "")
 
     class Config:
         case_sensitive = True
@@ -24,6 +79,41 @@ class Settings(BaseSettings):
     VERSION: str = os.getenv("VERSION")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     DATABASE_URI: str = os.getenv("DATABASE_URL")
+    ASYNC_DATABASE: bool = os.getenv("ASYNC_DATABASE", False)
+    ASYNC_DATABASE_URI: str | None = os.getenv("ASYNC_DATABASE_URL")
+    DB_POOL_SIZE: int = os.getenv("DB_POOL_SIZE", 5)
+    DB_MAX_OVERFLOW: int = os.getenv("DB_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT: float = os.getenv("DB_POOL_TIMEOUT", 30)
+    DB_POOL_RECYCLE: int = os.getenv("DB_POOL_RECYCLE", -1)
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", False)
+    MIN_CLIENT_VERSION: str = os.getenv("MIN_CLIENT_VERSION", "2.1.0")
+    CLIENT_VERSION_PREFIXES: list[str] = ["/auth", "/customers"]
+    CLIENT_VERSION_POLICY: dict[str, str] = {}
+    CLIENT_VERSION_CACHE_SIZE: int = os.getenv(
+        "CLIENT_VERSION_CACHE_SIZE", 1024)
+    INTERNAL_API_TOKEN: str | None = os.getenv("INTERNAL_API_TOKEN")
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", False)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", False)
+    PROFILING_DIRECTORY: str = os.getenv(
+        "PROFILING_DIRECTORY", "/tmp/profiles")
+    PROFILING_MODE: str = os.getenv("PROFILING_MODE", "sampling")
+    PROFILING_INTERVAL: float = os.getenv("PROFILING_INTERVAL", 0.001)
+    MEMBERSHIP_FILTER_ENABLED: bool = os.getenv(
+        "MEMBERSHIP_FILTER_ENABLED", False)
+    MEMBERSHIP_FILTER_ERROR_RATE: float = os.getenv(
+        "MEMBERSHIP_FILTER_ERROR_RATE", 0.01)
+    MEMBERSHIP_FILTER_MIN_CAPACITY: int = os.getenv(
+        "MEMBERSHIP_FILTER_MIN_CAPACITY", 100000)
+    MEMBERSHIP_FILTER_REFRESH_SECONDS: float = os.getenv(
+        "MEMBERSHIP_FILTER_REFRESH_SECONDS", 300)
+    MEMBERSHIP_FILTER_REFRESH_COOLDOWN_SECONDS: float = os.getenv(
+        "MEMBERSHIP_FILTER_REFRESH_COOLDOWN_SECONDS", 60)
+    CUSTOMER_PROFILE_CACHE_MAXSIZE: int = os.getenv(
+        "CUSTOMER_PROFILE_CACHE_MAXSIZE", 10000)
+    CUSTOMER_PROFILE_CACHE_TTL_SECONDS: int = os.getenv(
+        "CUSTOMER_PROFILE_CACHE_TTL_SECONDS", 60)
+    CUSTOMER_PROFILE_CACHE_VALIDATE: bool = os.getenv(
+        "CUSTOMER_PROFILE_CACHE_VALIDATE", True)
 
     class Config:
         case_sensitive = True
@@ -39,5 +129,7 @@ class TestSettings(Settings):
 
 
 jwt_settings = JWTSettings()
+hashing_settings = HashingSettings()
+login_rate_limit_settings = LoginRateLimitSettings()
 settings = Settings()
 test_settings = TestSettings()
@@ -1,9 +1,144 @@
+import time
+import inspect
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_uri(database_uri: str) -> str:
+    """Return the database uri using the async driver of its dialect."""
+
+    dialect, separator, rest = database_uri.partition("://")
+    dialect = ASYNC_DRIVERS.get(dialect.split("+")[0], dialect)
+
+    return f"{dialect}{separator}{rest}"
+
+
+def get_pool_options() -> dict:
+    """Return the connection pool options shared by both engines."""
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URI,
+    poolclass=InstrumentedQueuePool,
+    **get_pool_options())
+
+async_engine = None
+
+if settings.ASYNC_DATABASE:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URI or get_async_database_uri(
+            settings.DATABASE_URI),
+        poolclass=InstrumentedAsyncQueuePool,
+        **get_pool_options())
+
+
+def start_statement_timer(connection, cursor, statement, parameters,
+                          context, executemany) -> None:
+    """Remember when a statement was sent to the database.
+
+    The start time is kept on the execution context of the statement, so a
+    statement that fails leaves nothing behind on its connection.
+    """
+
+    context.statement_started = time.perf_counter()
+
+
+def stop_statement_timer(connection, cursor, statement, parameters,
+                         context, executemany) -> None:
+    """Record the statement duration as the db section of the request."""
+
+    started = getattr(context, "statement_started", None)
+
+    if started is not None:
+        metrics.observe_section("db", time.perf_counter() - started)
+
+
+class StatementRecorder:
+    """Records the statements executed on an engine while it is active.
+
+    Used as a context manager, every statement sent through the engine is
+    kept with its duration until the block exits.
+    """
+
+    def __init__(self, database_engine):
+        self.engine = database_engine
+        self.statements: list[tuple[str, float]] = []
+
+    def __enter__(self) -> "StatementRecorder":
+        event.listen(self.engine, "before_cursor_execute", self.start)
+        event.listen(self.engine, "after_cursor_execute", self.record)
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self.start)
+        event.remove(self.engine, "after_cursor_execute", self.record)
+
+    def start(self, connection, cursor, statement, parameters,
+              context, executemany) -> None:
+        connection.info["recorder_started"] = time.perf_counter()
 
+    def record(self, connection, cursor, statement, parameters,
+               context, executemany) -> None:
+        self.statements.append((
+            statement,
+            time.perf_counter() - connection.info.pop("recorder_started")))
 
-engine = create_engine(settings.DATABASE_URI)
+    @property
+    def count(self) -> int:
+        """Number of statements recorded."""
+
+        return len(self.statements)
+
+    @property
+    def duration(self) -> float:
+        """Total time spent in the recorded statements, in seconds."""
+
+        return sum(duration for _, duration in self.statements)
+
+
+def instrument_engine(database_engine) -> None:
+    """Time every statement executed through an engine."""
+
+    event.listen(database_engine, "before_cursor_execute", start_statement_timer)
+    event.listen(database_engine, "after_cursor_execute", stop_statement_timer)
+
+
+instrument_engine(engine)
+
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+
+def record_statements() -> StatementRecorder:
+    """Return a recorder of the engine used by the API sessions."""
+
+    if async_engine is not None:
+        return StatementRecorder(async_engine.sync_engine)
+
+    return StatementRecorder(engine)
 
 
 def create_db_and_tables() -> None:
@@ -12,8 +147,43 @@ def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
 
 
+def get_pool_statistics() -> dict:
+    """Return the live statistics of every connection pool."""
+
+    statistics = {"sync": engine.pool.get_statistics()}
+
+    if async_engine is not None:
+        statistics["async"] = async_engine.pool.get_statistics()
+
+    return statistics
+
+
 def get_session():
     """Gives a session to the database."""
 
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    """Gives an async session to the database."""
+
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+get_database_session = (
+    get_async_session if settings.ASYNC_DATABASE else get_session)
+
+
+async def run_database_call(function, *args):
+    """Await a controller database call in sync and async database modes.
+
+    Async controller methods are awaited directly, blocking ones run in the
+    threadpool so they never stall the event loop.
+    """
+
+    if inspect.iscoroutinefunction(function):
+        return await function(*args)
+
+    return await run_in_threadpool(function, *args)
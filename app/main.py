@@ -1,11 +1,31 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.api import api
-from app.config import Settings, settings
+from app.config import Settings, hashing_settings, jwt_settings, settings
 from app.utils.logger import logger_config
-from app.database import create_db_and_tables
+from app.database import async_engine, create_db_and_tables
+from app.api.auth.hashing import (
+    calibrate_bcrypt_rounds,
+    configure_bcrypt_rounds,
+    get_bcrypt_rounds,
+    password_hasher
+)
+from app.api.auth.controllers import (
+    principal_cache,
+    prune_refresh_tokens_periodically,
+    token_cache
+)
+from app.api.common.membership import membership_filter
+from app.api.customers.controllers import customer_profile_cache
+from app.api.common.versions import (
+    ClientVersionMiddleware,
+    VersionConstroller
+)
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
 
 
 logger = logger_config(__name__)
@@ -17,10 +37,48 @@ async def lifespan(app: FastAPI):
 
     create_db_and_tables()
 
+    if hashing_settings.BCRYPT_CALIBRATE:
+        configure_bcrypt_rounds(calibrate_bcrypt_rounds(
+            hashing_settings.BCRYPT_TARGET_MS / 1000,
+            hashing_settings.BCRYPT_MIN_ROUNDS,
+            hashing_settings.BCRYPT_MAX_ROUNDS),
+            min_rounds=hashing_settings.BCRYPT_MIN_ROUNDS)
+
+    logger.info("bcrypt: hashing with %s rounds", get_bcrypt_rounds())
+
+    refresh_task = None
+
+    if membership_filter.enabled:
+        membership_filter.build()
+
+        if membership_filter.refresh_seconds > 0:
+            refresh_task = asyncio.create_task(
+                membership_filter.refresh_periodically())
+
+    prune_task = None
+
+    if (jwt_settings.REFRESH_TOKENS_ENABLED
+            and jwt_settings.REFRESH_TOKEN_PRUNE_SECONDS > 0):
+        prune_task = asyncio.create_task(prune_refresh_tokens_periodically(
+            jwt_settings.REFRESH_TOKEN_PRUNE_SECONDS))
+
     logger.info("startup: triggered")
 
     yield
 
+    for task in (refresh_task, prune_task):
+        if task is not None:
+            task.cancel()
+
+    password_hasher.shutdown()
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+    logger.info("token cache: %s", token_cache.stats())
+    logger.info("principal cache: %s", principal_cache.stats())
+    logger.info("customer profile cache: %s", customer_profile_cache.stats())
+
     logger.info("shutdown: triggered")
 
 
@@ -35,6 +93,21 @@ def create_application(app_settings: Settings) -> FastAPI:
         lifespan=lifespan,
     )
 
+    application.add_middleware(
+        ClientVersionMiddleware, version_controller=VersionConstroller())
+    application.add_middleware(
+        MetricsMiddleware,
+        server_timing=app_settings.SERVER_TIMING_ENABLED)
+
+    if app_settings.PROFILING_ENABLED:
+        if app_settings.ENV == "production":
+            logger.warning("profiling: disabled in production")
+        else:
+            application.add_middleware(
+                ProfilingMiddleware,
+                directory=app_settings.PROFILING_DIRECTORY,
+                mode=app_settings.PROFILING_MODE,
+                interval=app_settings.PROFILING_INTERVAL)
     application.include_router(api)
 
     return application
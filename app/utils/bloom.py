@@ -0,0 +1,71 @@
+import math
+import hashlib
+import threading
+
+
+class BloomFilter:
+    """Bloom filter of strings sized for a capacity and a false positive rate.
+
+    Lookups never miss an added value, a value that was never added is
+    reported as present with about ``error_rate`` probability while the
+    filter holds at most ``capacity`` values.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+
+        self.size = math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count: int = 0
+
+        self._lock = threading.Lock()
+
+    def get_positions(self, value: str) -> list[int]:
+        """Return the bit positions of a value using double hashing."""
+
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, value: str) -> None:
+        """Add a value to the filter."""
+
+        positions = self.get_positions(value)
+
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(value)
+        )
+
+    def get_false_positive_rate(self) -> float:
+        """Return the expected false positive rate for the current count."""
+
+        fill_ratio = 1 - math.exp(-self.hashes * self.count / self.size)
+
+        return fill_ratio ** self.hashes
+
+    def stats(self) -> dict:
+        """Return the size, memory footprint and expected error of the filter."""
+
+        return {
+            "count": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_bytes": len(self.bits),
+            "false_positive_rate": self.get_false_positive_rate(),
+        }
@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Thread safe LRU cache where every entry has its own expiry time.
+
+    When ``sizeof`` is given, the stats also report the memory held by the
+    cached values, measured with it.
+    """
+
+    def __init__(
+            self, maxsize: int, ttl: float,
+            sizeof: Callable[[Any], int] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value or default when missing or expired."""
+
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store a value, the entry lives at most ttl seconds."""
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry from the cache."""
+
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Return the counters of the cache."""
+
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+        if self.sizeof is not None:
+            with self._lock:
+                stats["memory_bytes"] = sum(
+                    self.sizeof(value) for value, _ in self._data.values())
+
+        return stats
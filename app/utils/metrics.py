@@ -0,0 +1,223 @@
+import time
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+
+
+class Histogram:
+    """Thread safe histogram with cumulative buckets in seconds."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        """Return cumulative bucket counts, sum and count."""
+
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+
+        return {"buckets": buckets, "sum": total, "count": count}
+
+
+request_timings: ContextVar[dict | None] = ContextVar(
+    "request_timings", default=None)
+
+
+class MetricsRegistry:
+    """Aggregates request counts, route latency and timed sections."""
+
+    def __init__(self):
+        self.requests: dict = defaultdict(int)
+        self.route_latency: dict = defaultdict(Histogram)
+        self.section_latency: dict = defaultdict(Histogram)
+        self.route_statements: dict = defaultdict(
+            lambda: Histogram(STATEMENT_BUCKETS))
+        self._lock = threading.Lock()
+
+    def observe_request(
+            self, method: str, route: str,
+            status_code: int, seconds: float, statements: int = 0) -> None:
+        """Record a finished request and the statements it executed."""
+
+        with self._lock:
+            self.requests[(method, route, status_code)] += 1
+            histogram = self.route_latency[route]
+            statements_histogram = self.route_statements[route]
+
+        histogram.observe(seconds)
+        statements_histogram.observe(statements)
+
+    def observe_section(self, name: str, seconds: float) -> None:
+        """Record a timed section, also on the current request if any."""
+
+        with self._lock:
+            histogram = self.section_latency[name]
+
+        histogram.observe(seconds)
+
+        timings = request_timings.get()
+        if timings is not None:
+            duration, count = timings.get(name, (0.0, 0))
+            timings[name] = (duration + seconds, count + 1)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format."""
+
+        lines = [
+            "# HELP http_requests_total Requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            requests = dict(self.requests)
+            route_latency = dict(self.route_latency)
+            section_latency = dict(self.section_latency)
+            route_statements = dict(self.route_statements)
+
+        for (method, route, status_code), count in sorted(requests.items()):
+            lines.append(
+                'http_requests_total{{method="{}",route="{}",status="{}"}} '
+                '{}'.format(method, route, status_code, count))
+
+        lines.extend(render_histograms(
+            "http_request_duration_seconds",
+            "Request latency by route.", "route", route_latency))
+        lines.extend(render_histograms(
+            "section_duration_seconds",
+            "Latency of timed sections like bcrypt, JWT and SQL.",
+            "section", section_latency))
+        lines.extend(render_histograms(
+            "http_request_db_statements",
+            "Database statements executed per request by route.",
+            "route", route_statements))
+
+        return "\n".join(lines) + "\n"
+
+
+def render_histograms(
+        name: str, description: str, label: str, histograms: dict) -> list:
+    """Return the Prometheus text lines of labelled histograms."""
+
+    lines = [
+        "# HELP {} {}".format(name, description),
+        "# TYPE {} histogram".format(name),
+    ]
+
+    for label_value, histogram in sorted(histograms.items()):
+        snapshot = histogram.snapshot()
+
+        for bound, count in snapshot["buckets"].items():
+            lines.append('{}_bucket{{{}="{}",le="{}"}} {}'.format(
+                name, label, label_value, bound, count))
+
+        lines.append('{}_sum{{{}="{}"}} {}'.format(
+            name, label, label_value, snapshot["sum"]))
+        lines.append('{}_count{{{}="{}"}} {}'.format(
+            name, label, label_value, snapshot["count"]))
+
+    return lines
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def timed_section(name: str):
+    """Time a block of code as a named section of the current request."""
+
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        metrics.observe_section(name, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times requests and emits Server-Timing.
+
+    Sections recorded with ``timed_section`` while the request runs are
+    added to the Server-Timing response header when enabled.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = {}
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", format_server_timing(
+                        timings, time.perf_counter() - started))
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - started,
+                statements=timings.get("db", (0.0, 0))[1])
+
+
+def format_server_timing(timings: dict, total_seconds: float) -> str:
+    """Return a Server-Timing header value, durations in milliseconds."""
+
+    metrics_values = [
+        '{};dur={:.3f};desc="{}x"'.format(name, duration * 1000, count)
+        for name, (duration, count) in timings.items()
+    ]
+    metrics_values.append("total;dur={:.3f}".format(total_seconds * 1000))
+
+    return ", ".join(metrics_values)
@@ -0,0 +1,63 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utils.metrics import Histogram
+
+
+POOL_WAIT_BUCKETS = (
+    0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolStatistics:
+    """Counters collected while connections are checked out of a pool."""
+
+    def __init__(self):
+        self.wait_time = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts: int = 0
+
+
+class InstrumentedPoolMixin:
+    """Times every connection checkout and counts pool timeouts.
+
+    Statistics live on the class so they survive ``Pool.recreate``, each
+    engine has to use its own pool class.
+    """
+
+    statistics: PoolStatistics
+
+    def _do_get(self):
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.statistics.timeouts += 1
+            raise
+        finally:
+            self.statistics.wait_time.observe(time.perf_counter() - started)
+
+    def get_statistics(self) -> dict:
+        """Return the live state and counters of the pool."""
+
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "timeouts": self.statistics.timeouts,
+            "wait_time_seconds": self.statistics.wait_time.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool used by the blocking engine."""
+
+    statistics = PoolStatistics()
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool used by the async engine."""
+
+    statistics = PoolStatistics()
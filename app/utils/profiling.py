@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.logger import logger_config
+
+
+logger = logger_config(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+PROFILE_QUERY_PARAMETER = "profile"
+
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread at a fixed interval.
+
+    Unlike cProfile it also sees the work that runs in the threadpool,
+    like blocking controllers, bcrypt and database calls. Samples of idle
+    threads waiting on a lock, a queue or a selector are dropped.
+    """
+
+    extension = "collapsed"
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self.sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def sample(self) -> None:
+        sampler_id = threading.get_ident()
+
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+
+                if frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append("{}:{}".format(
+                        os.path.basename(frame.f_code.co_filename),
+                        frame.f_code.co_name))
+                    frame = frame.f_back
+
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, file_path: str) -> None:
+        """Write the samples in the collapsed stack format of flamegraphs."""
+
+        with open(file_path, 'w') as profile_file:
+            for stack, count in self.samples.most_common():
+                profile_file.write("{} {}\n".format(stack, count))
+
+
+class DeterministicProfiler:
+    """cProfile of the event loop thread, work in the threadpool is not seen."""
+
+    extension = "prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+
+    def dump(self, file_path: str) -> None:
+        self.profile.dump_stats(file_path)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests asking for it.
+
+    A request is profiled when it sends the ``x-profile`` header or the
+    ``profile`` query parameter. Only one request is profiled at a time,
+    others asking for it meanwhile are served without profiling. The
+    profile is written to ``directory`` named after the route and timing.
+    """
+
+    def __init__(
+            self, app: ASGIApp, directory: str,
+            mode: str = "sampling", interval: float = 0.001):
+        self.app = app
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def get_profiler(self) -> SamplingProfiler | DeterministicProfiler:
+        if self.mode == "cprofile":
+            return DeterministicProfiler()
+
+        return SamplingProfiler(self.interval)
+
+    def is_requested(self, scope: Scope) -> bool:
+        """Check the profiling header and query parameter of a request."""
+
+        if any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            return True
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+        return PROFILE_QUERY_PARAMETER in query
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.is_requested(scope):
+            return await self.app(scope, receive, send)
+
+        if not self._lock.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profiler = self.get_profiler()
+        started = time.perf_counter()
+
+        try:
+            profiler.start()
+
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.stop()
+
+            self.save(scope, profiler, time.perf_counter() - started)
+        finally:
+            self._lock.release()
+
+    def save(
+            self, scope: Scope,
+            profiler: SamplingProfiler | DeterministicProfiler,
+            seconds: float) -> str:
+        """Write a profile named after its route and duration."""
+
+        route = scope.get("route")
+        route_name = route.name if route is not None else "unmatched"
+
+        file_path = os.path.join(
+            self.directory,
+            "{}-{}-{}-{:.0f}ms.{}".format(
+                time.strftime("%Y%m%dT%H%M%S"), scope["method"], route_name,
+                seconds * 1000, profiler.extension))
+
+        profiler.dump(file_path)
+
+        logger.info("Profiled %s %s in %.1f ms: %s",
+                    scope["method"], scope["path"], seconds * 1000, file_path)
+
+        return file_path
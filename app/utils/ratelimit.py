@@ -0,0 +1,107 @@
+import time
+import threading
+from typing import Hashable
+
+
+class TokenBucketStore:
+    """Thread safe token buckets spread over independently locked shards.
+
+    Every key gets a bucket of ``capacity`` tokens refilled at ``rate``
+    tokens per second. Buckets that have refilled completely hold no more
+    information than a new one, they are swept from their shard at most
+    once every ``sweep_interval`` seconds.
+    """
+
+    def __init__(
+            self, capacity: float, rate: float,
+            shards: int = 16, sweep_interval: float = 60):
+        self.capacity = capacity
+        self.rate = rate
+        self.sweep_interval = sweep_interval
+
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._swept_at = [time.monotonic()] * shards
+
+        self.allowed: int = 0
+        self.shed: int = 0
+        self.swept: int = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def refill(self, bucket: list, now: float) -> float:
+        """Return the tokens of a bucket after refilling it up to now."""
+
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token, return 0 or the seconds until one is available."""
+
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+        now = time.monotonic()
+
+        with self._locks[index]:
+            if now - self._swept_at[index] >= self.sweep_interval:
+                self.sweep_shard(index, now)
+
+            bucket = shard.get(key)
+            tokens = self.capacity if bucket is None else self.refill(
+                bucket, now)
+
+            if tokens < 1:
+                shard[key] = [tokens, now]
+                self.shed += 1
+
+                return (1 - tokens) / self.rate
+
+            shard[key] = [tokens - 1, now]
+            self.allowed += 1
+
+            return 0
+
+    def release(self, key: Hashable) -> None:
+        """Give back a token taken by an attempt that turned out legitimate."""
+
+        index = hash(key) % len(self._shards)
+        now = time.monotonic()
+
+        with self._locks[index]:
+            bucket = self._shards[index].get(key)
+
+            if bucket is not None:
+                bucket[0] = min(self.capacity, self.refill(bucket, now) + 1)
+                bucket[1] = now
+
+    def sweep_shard(self, index: int, now: float) -> None:
+        """Drop the full buckets of a shard, its lock must be held."""
+
+        shard = self._shards[index]
+        full_keys = [
+            key for key, bucket in shard.items()
+            if self.refill(bucket, now) >= self.capacity
+        ]
+
+        for key in full_keys:
+            del shard[key]
+
+        self.swept += len(full_keys)
+        self._swept_at[index] = now
+
+    def clear(self) -> None:
+        """Drop every bucket."""
+
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                shard.clear()
+
+    def stats(self) -> dict:
+        """Return the bucket count and the allowed, shed and swept counters."""
+
+        return {
+            "buckets": len(self),
+            "allowed": self.allowed,
+            "shed": self.shed,
+            "swept": self.swept,
+        }
@@ -0,0 +1,17 @@
+-- Case-insensitive unique lookup on authuser.username.
+-- SQLModel.metadata.create_all only builds the index for new tables, run this
+-- once against databases created before the index existed.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block. Apply this
+-- file with plain `psql -f`, which commits every statement on its own, never
+-- with --single-transaction or wrapped in BEGIN/COMMIT.
+--
+-- Duplicated usernames must be merged before the index can be created:
+--   SELECT lower(username), count(*) FROM authuser
+--   GROUP BY lower(username) HAVING count(*) > 1;
+
+UPDATE authuser SET username = lower(trim(username))
+WHERE username <> lower(trim(username));
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_authuser_username_lower
+ON authuser (lower(username));
@@ -0,0 +1,7 @@
+-- Credential version of every AuthUser, embedded in access tokens when
+-- ACCESS_TOKEN_CLAIMS_ENABLED is set and bumped on every password change.
+-- SQLModel.metadata.create_all only builds the column for new tables, run this
+-- once against databases created before the column existed.
+
+ALTER TABLE authuser
+ADD COLUMN IF NOT EXISTS credential_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,7 @@
+-- Version of every Customer, bumped on every profile update and used to build
+-- the ETag of /customers/me and to check If-Match on /customers/me/edit-data.
+-- SQLModel.metadata.create_all only builds the column for new tables, run this
+-- once against databases created before the column existed.
+
+ALTER TABLE customer
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
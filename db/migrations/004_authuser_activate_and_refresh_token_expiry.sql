@@ -0,0 +1,14 @@
+-- New AuthUsers are created active, and password logins and refresh tokens of
+-- inactive users are rejected. Before this change no code path ever set
+-- authuser.is_active, so every existing row still holds the column default
+-- FALSE and none of them was deactivated on purpose. Run this once so these
+-- users keep logging in. If accounts were deactivated by hand in the
+-- meantime, exclude them from the UPDATE.
+--
+-- The index serves the periodic deletion of expired refresh tokens,
+-- SQLModel.metadata.create_all only builds it for new tables.
+
+UPDATE authuser SET is_active = TRUE WHERE is_active = FALSE;
+
+CREATE INDEX IF NOT EXISTS ix_refreshtoken_expires_at
+ON refreshtoken (expires_at);
@@ -0,0 +1,6 @@
+-- Cached /customers/me profiles are checked against the stored version of the
+-- customer of their user on every hit. SQLModel.metadata.create_all only builds
+-- the index for new tables, run this once against existing databases.
+
+CREATE INDEX IF NOT EXISTS ix_customer_user
+ON customer ("user");
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import statistics
+import time
+
+import typer
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.utils.logger import logger_config
+from app.api.auth.models import AuthUser
+from app.api.auth.hashing import hash_password
+from app.api.auth.controllers import UserController
+
+
+logger = logger_config(__name__)
+
+user_controller = UserController()
+
+
+def populate_users(engine, users: int, password_hash: str) -> None:
+    """Insert synthetic AuthUser rows in batches."""
+
+    batch_size = 10000
+
+    with engine.begin() as connection:
+        for start in range(0, users, batch_size):
+            rows = [
+                {
+                    "id": index + 1,
+                    "username": f"user{index}@example.com",
+                    "password": password_hash,
+                    "is_active": True,
+                    "is_superuser": False,
+                }
+                for index in range(start, min(start + batch_size, users))
+            ]
+            connection.execute(insert(AuthUser), rows)
+
+
+def summarize(label: str, timings: list) -> None:
+    """Log p50, p99 and max latency in milliseconds."""
+
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+    logger.info(
+        "%s: runs=%s p50=%.3fms p99=%.3fms max=%.3fms",
+        label, len(timings), statistics.median(timings) * 1000,
+        p99 * 1000, timings[-1] * 1000)
+
+
+def benchmark_auth_lookup(
+        database_url: str,
+        users: int = 1_000_000,
+        lookups: int = 2000,
+        logins: int = 20,
+        populate: bool = True,
+        drop_index: bool = False,
+        schema: str = "auth_benchmark") -> None:
+    """Measure AuthUser lookup and login latency on a large user table.
+
+    The authuser table lives in its own PostgreSQL schema, so the tables of
+    the application are never touched. It is dropped, created and filled
+    with synthetic users when --populate is set.
+    """
+
+    if schema == "public":
+        raise typer.BadParameter("Use a schema other than public.")
+
+    engine = create_engine(database_url)
+
+    if engine.dialect.name != "postgresql":
+        raise typer.BadParameter("The benchmark needs a PostgreSQL database.")
+
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+
+    engine = engine.execution_options(schema_translate_map={None: schema})
+    password = "password123"
+
+    if populate:
+        SQLModel.metadata.drop_all(engine, tables=[AuthUser.__table__])
+        SQLModel.metadata.create_all(engine, tables=[AuthUser.__table__])
+
+        started = time.perf_counter()
+        populate_users(engine, users, hash_password(password))
+        logger.info(
+            "Inserted %s users in %.1fs", users, time.perf_counter() - started)
+
+    if drop_index:
+        with engine.begin() as connection:
+            connection.execute(
+                text(f'DROP INDEX IF EXISTS "{schema}".'
+                     'ix_authuser_username_lower'))
+
+    usernames = [
+        f"User{random.randrange(users)}@Example.com" for _ in range(lookups)]
+
+    with Session(engine) as session:
+        timings = []
+        for username in usernames:
+            started = time.perf_counter()
+            user = user_controller.get_user(username, session)
+            timings.append(time.perf_counter() - started)
+
+            assert user is not None
+
+        summarize("get_user", timings)
+
+        timings = []
+        for username in usernames[:logins]:
+            started = time.perf_counter()
+            user = asyncio.run(user_controller.authenticate_user(
+                username, password, session))
+            timings.append(time.perf_counter() - started)
+
+            assert user
+
+        summarize("authenticate_user", timings)
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_auth_lookup)
@@ -0,0 +1,142 @@
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import tempfile
+from typing import Dict, List
+
+import typer
+
+from app.utils.logger import logger_config
+
+
+logger = logger_config(__name__)
+
+IMPORT_OPTIONS = {
+    "bulk": False,
+    "workers": 1,
+    "resume": False,
+    "checkpoint_path": None,
+    "pipeline": False,
+    "queue_depth": 4,
+    "reject_path": None,
+    "fast_decode": False,
+}
+
+MODES = {
+    "orm": {},
+    "bulk": {"bulk": True},
+    "pipeline": {"bulk": True, "pipeline": True},
+    "fast": {"bulk": True, "pipeline": True, "fast_decode": True},
+    "parallel": {"bulk": True, "pipeline": True, "fast_decode": True},
+}
+
+
+def run_import(
+        database_url: str, file_path: str, options: Dict,
+        results: multiprocessing.Queue) -> None:
+    """Import a file in a fresh process and report its summary."""
+
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import delete
+
+    import import_customers
+    from app.database import create_db_and_tables
+    from app.api.auth.models import AuthUser  # noqa: F401
+    from app.api.customers.models import Customer
+
+    create_db_and_tables()
+
+    with import_customers.engine.begin() as connection:
+        connection.execute(delete(Customer))
+
+    summary = import_customers.import_customer_json_file(file_path, **options)
+
+    peak_rss_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    summary["peak_rss_mb"] = peak_rss_kb / 1024
+
+    results.put(summary)
+
+
+def benchmark_import(
+        database_url: str,
+        file_path: str = typer.Option(
+            None, help="Export to import, generated when missing."),
+        rows: int = typer.Option(
+            100_000, help="Rows of the generated export."),
+        modes: List[str] = typer.Option(
+            ["orm", "bulk", "pipeline", "fast", "parallel"],
+            help="Import modes to run: {}.".format(", ".join(MODES))),
+        workers: int = typer.Option(
+            4, help="Worker processes of the parallel mode."),
+        output: str = typer.Option(
+            None, help="Write the results as JSON to this file.")
+) -> None:
+    """Run the customer importer in several modes and compare them.
+
+    The customer table of DATABASE_URL is emptied before every run, use a
+    dedicated PostgreSQL database or a SQLite file as a stand-in.
+    """
+
+    if file_path is None:
+        from generate_customers import generate_customer_json_file
+
+        file_path = os.path.join(tempfile.mkdtemp(), "customers.jsonl")
+        generate_customer_json_file(
+            file_path, rows=rows, duplicate_rate=0.01,
+            invalid_json_rate=0.001, bad_language_rate=0.05, seed=42)
+
+    context = multiprocessing.get_context("spawn")
+    benchmark_results = {}
+
+    for mode in modes:
+        options = dict(IMPORT_OPTIONS, **MODES[mode])
+        options["checkpoint_path"] = file_path + "." + mode + ".checkpoint"
+        options["reject_path"] = file_path + "." + mode + ".rejects.jsonl"
+
+        if mode == "parallel":
+            options["workers"] = workers
+
+        results = context.Queue()
+        process = context.Process(
+            target=run_import,
+            args=(database_url, file_path, options, results))
+        process.start()
+
+        summary = None
+        while summary is None and (
+                process.is_alive() or not results.empty()):
+            try:
+                summary = results.get(timeout=1)
+            except queue.Empty:
+                continue
+
+        process.join()
+
+        if summary is None:
+            logger.error("{}: import failed with exit code {}".format(
+                mode, process.exitcode))
+            continue
+
+        summary["rows_per_second"] = summary["processed"] / summary["seconds"]
+        benchmark_results[mode] = summary
+
+        logger.info((
+            "{}: {:.0f} rows/s, {:.1f}s, peak RSS {:.0f} MB, "
+            "{} round trips, {} inserted, {} skipped, {} rejected").format(
+                mode, summary["rows_per_second"], summary["seconds"],
+                summary["peak_rss_mb"], summary["statements"],
+                summary["inserted"], summary["skipped"],
+                summary["rejected"]))
+
+    if output:
+        with open(output, 'w') as output_file:
+            json.dump(benchmark_results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_import)
@@ -0,0 +1,103 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import typer
+from jose import jwt as jose_jwt
+
+from app.utils.logger import logger_config
+from app.api.auth.tokens import (
+    TOKEN_BACKENDS,
+    TokenService,
+    generate_key_pair
+)
+
+
+logger = logger_config(__name__)
+
+SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
+
+
+def get_token_service(backend_name: str, algorithm: str) -> TokenService:
+    """Return a token service of a backend with freshly generated keys."""
+
+    backend = TOKEN_BACKENDS[backend_name]()
+
+    if algorithm.startswith("HS"):
+        signing_key = backend.load_secret(SECRET_KEY, algorithm)
+        verification_key = signing_key
+    else:
+        private_pem, public_pem = generate_key_pair(algorithm)
+        signing_key = backend.load_private_key(private_pem, algorithm)
+        verification_key = backend.load_public_key(public_pem, algorithm)
+
+    return TokenService(
+        backend, algorithm, "benchmark", signing_key,
+        {"benchmark": verification_key})
+
+
+def measure(function, iterations: int) -> float:
+    """Return the operations per second of a function."""
+
+    started = time.perf_counter()
+
+    for _ in range(iterations):
+        function()
+
+    return iterations / (time.perf_counter() - started)
+
+
+def benchmark_jwt(
+        iterations: int = typer.Option(
+            5000, help="Tokens encoded and decoded per combination."),
+        backends: List[str] = typer.Option(
+            list(TOKEN_BACKENDS), help="Token backends to compare."),
+        algorithms: List[str] = typer.Option(
+            ["HS256", "RS256", "EdDSA"], help="Signing algorithms to compare.")
+) -> None:
+    """Compare encode and decode throughput of the token backends.
+
+    The raw python-jose calls with the secret string used before the token
+    service are measured as a baseline.
+    """
+
+    claims = {
+        "sub": "customer@example.com",
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+    }
+
+    private_pem, public_pem = generate_key_pair("RS256")
+    raw_keys = {
+        "HS256": (SECRET_KEY, SECRET_KEY),
+        "RS256": (private_pem, public_pem),
+    }
+
+    for algorithm, (signing_key, verification_key) in raw_keys.items():
+        token = jose_jwt.encode(claims, signing_key, algorithm=algorithm)
+
+        logger.info("raw jose {}: encode {:.0f}/s, decode {:.0f}/s".format(
+            algorithm,
+            measure(lambda: jose_jwt.encode(
+                claims, signing_key, algorithm=algorithm), iterations),
+            measure(lambda: jose_jwt.decode(
+                token, verification_key, algorithms=[algorithm]),
+                iterations)))
+
+    for backend_name in backends:
+        for algorithm in algorithms:
+            try:
+                token_service = get_token_service(backend_name, algorithm)
+            except ValueError as error:
+                logger.info("{} {}: {}".format(backend_name, algorithm, error))
+                continue
+
+            token = token_service.encode(claims)
+
+            logger.info("{} {}: encode {:.0f}/s, decode {:.0f}/s".format(
+                backend_name, algorithm,
+                measure(lambda: token_service.encode(claims), iterations),
+                measure(lambda: token_service.decode(token), iterations)))
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_jwt)
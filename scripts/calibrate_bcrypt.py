@@ -0,0 +1,36 @@
+import typer
+
+from app.config import hashing_settings
+from app.utils.logger import logger_config
+from app.api.auth.hashing import calibrate_bcrypt_rounds, get_bcrypt_rounds
+
+
+logger = logger_config(__name__)
+
+
+def calibrate_bcrypt(
+        target_ms: float = typer.Option(
+            hashing_settings.BCRYPT_TARGET_MS,
+            help="Latency target of a single hash in milliseconds."),
+        min_rounds: int = typer.Option(
+            hashing_settings.BCRYPT_MIN_ROUNDS,
+            help="Lowest bcrypt cost accepted."),
+        max_rounds: int = typer.Option(
+            hashing_settings.BCRYPT_MAX_ROUNDS,
+            help="Highest bcrypt cost accepted.")
+) -> None:
+    """Find the bcrypt cost that meets a per-hash latency target on this host.
+
+    Set the result as BCRYPT_ROUNDS on every worker, stored hashes with a
+    lower cost are rehashed at the next successful login.
+    """
+
+    rounds = calibrate_bcrypt_rounds(target_ms / 1000, min_rounds, max_rounds)
+
+    logger.info("bcrypt: current cost is %s rounds", get_bcrypt_rounds())
+    logger.info("bcrypt: use BCRYPT_ROUNDS=%s for a %s ms target",
+                rounds, target_ms)
+
+
+if __name__ == "__main__":
+    typer.run(calibrate_bcrypt)
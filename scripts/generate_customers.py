@@ -0,0 +1,75 @@
+import json
+import random
+import uuid
+
+import typer
+
+from app.utils.logger import logger_config
+
+
+logger = logger_config(__name__)
+
+COUNTRIES = ("DE", "US", "GB", "FR", "ES", "IT", "NL", "AT", "CH", "PL")
+
+LANGUAGES = ("de", "en")
+
+BAD_LANGUAGES = ("fr", "es", "", None)
+
+
+def generate_customer_json_file(
+        file_path: str,
+        rows: int = typer.Option(1_000_000, help="Rows to write."),
+        duplicate_rate: float = typer.Option(
+            0.01, help="Share of rows repeating an earlier customer."),
+        invalid_json_rate: float = typer.Option(
+            0.001, help="Share of rows that are not valid JSON."),
+        bad_language_rate: float = typer.Option(
+            0.05, help="Share of rows with an unsupported language."),
+        seed: int = typer.Option(42, help="Seed of the random generator.")
+) -> None:
+    """Write a synthetic customer export in the JSONL import format."""
+
+    generator = random.Random(seed)
+    written_customers = []
+
+    counters = {"duplicates": 0, "invalid_json": 0, "bad_language": 0}
+
+    with open(file_path, 'w') as export_file:
+        for index in range(rows):
+            draw = generator.random()
+
+            if draw < invalid_json_rate:
+                counters["invalid_json"] += 1
+                export_file.write('{"customer_id": "broken row\n')
+                continue
+
+            if draw < invalid_json_rate + duplicate_rate and written_customers:
+                counters["duplicates"] += 1
+                export_file.write(generator.choice(written_customers))
+                continue
+
+            customer_id = uuid.UUID(int=generator.getrandbits(128), version=4)
+            language = generator.choice(LANGUAGES)
+
+            if generator.random() < bad_language_rate:
+                counters["bad_language"] += 1
+                language = generator.choice(BAD_LANGUAGES)
+
+            line = json.dumps({
+                "customer_id": str(customer_id),
+                "email": "customer{}@example.com".format(index),
+                "country": generator.choice(COUNTRIES),
+                "language": language,
+            }) + "\n"
+            export_file.write(line)
+
+            if len(written_customers) < 10000:
+                written_customers.append(line)
+            else:
+                written_customers[generator.randrange(10000)] = line
+
+    logger.info("Wrote {} rows to {}: {}".format(rows, file_path, counters))
+
+
+if __name__ == "__main__":
+    typer.run(generate_customer_json_file)
@@ -1,6 +1,21 @@
+import csv
+import fcntl
+import io
+import mmap
+import os
+import queue
+import re
+import threading
+import time
 import typer
 import json
+import uuid
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session
 from typing import Iterator, List, Tuple, Dict
 
@@ -8,38 +23,93 @@ from app.utils.logger import logger_config
 from app.database import engine
 from app.api.customers.models import Customer
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logger_config(__name__)
 
 session = Session(engine)
 
+CHUNKS = 1000
+
+CUSTOMER_COLUMNS = ("customer_id", "email", "country", "language")
+
+INSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+LANGUAGES = frozenset(("de", "en"))
+
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+decode_json = json.loads
+
+row_statistics = {"language_defaulted": 0, "statements": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(*args) -> None:
+    """Count every statement sent to the database."""
+
+    row_statistics["statements"] += 1
+
+
+def configure_decoder(fast_decode: bool) -> None:
+    """Use orjson to decode rows when it is installed and requested."""
+
+    global decode_json
+
+    if fast_decode and orjson is None:
+        logger.warning("orjson is not installed, using the json module.")
+
+    decode_json = orjson.loads if fast_decode and orjson else json.loads
+
+
+def load_json_row(row: str) -> Dict | None:
+    """Convert a row to dict, returns None when the row is not valid JSON.
+
+    Rows without a supported language fall back to English, they are counted
+    in ``row_statistics`` instead of being logged one by one.
+    """
+
+    try:
+        loaded_json = decode_json(row)
+        if not loaded_json.get("language") in LANGUAGES:
+            row_statistics["language_defaulted"] += 1
+            loaded_json["language"] = "en"
+
+        return loaded_json
+
+    except Exception as error:
+        logger.error(
+            "Failed to load str to json in row: {}".format(repr(error)))
+
 
 def to_json_generator(file_handler: str) -> Iterator[Dict]:
     """Generate an Iterator object from a row converted to dict."""
 
     for row in file_handler:
-        try:
-            loaded_json = json.loads(row)
-            if not loaded_json.get("language") in ("de", "en"):
-                logger.info(
-                    "Language changed to English as default value for row: "
-                    "{}".format(row)
-                )
-                loaded_json["language"] = "en"
+        loaded_json = load_json_row(row)
 
+        if loaded_json is not None:
             yield loaded_json
 
-        except Exception as error:
-            logger.error(
-                "Failed to load str to json in row: {}".format(repr(error)))
-            continue
-
 
 def append_if_exists_generator(
         list_dicts_handler: List[Dict]) -> Iterator[Dict]:
     """Generate an Iterator object if item exists in the database."""
 
+    seen_customer_ids = set()
+
     for item in list_dicts_handler:
+        if item.get('customer_id') in seen_customer_ids:
+            continue
+        seen_customer_ids.add(item.get('customer_id'))
+
         try:
             exists = bool(session.get(Customer, item.get('customer_id')))
         except Exception as error:
@@ -66,54 +136,680 @@ def process_customer_block(
     inserted_rows = len(bulk_list_to_insert)
     skipped_rows = len(list_of_dicts) - inserted_rows
 
-    return inserted_rows, skipped_rows
+    return inserted_rows, skipped_rows, []
 
 
-def import_customer_json_file(file_path: str) -> None:
-    """Main function that triggers an import from a file."""
+def to_customer_rows(
+        list_of_dicts: List[Dict]) -> Tuple[List[Tuple], List[Dict]]:
+    """Validate rows into plain tuples ordered as CUSTOMER_COLUMNS.
 
-    chunks: int = 1000
-    counter: int = 0
-    block_counter: int = 0
+    Only the UUID, email and language are checked, no ORM instance is built
+    for rows that go straight into a bulk insert.
+    """
 
-    inserted_rows: int = 0
-    skipped_rows: int = 0
+    customer_rows = []
+    rejected_rows = []
 
-    total_inserted_rows: int = 0
-    total_skipped_rows: int = 0
-    block_to_process = []
+    for item in list_of_dicts:
+        try:
+            email = item["email"]
+            country = item["country"]
+            language = item["language"]
+
+            if not isinstance(email, str) or not EMAIL_PATTERN.fullmatch(
+                    email):
+                raise ValueError("invalid email {!r}".format(email))
+            if not isinstance(country, str) or not country:
+                raise ValueError("invalid country {!r}".format(country))
+            if language not in LANGUAGES:
+                raise ValueError("invalid language {!r}".format(language))
+
+            customer_rows.append((
+                str(uuid.UUID(item["customer_id"])), email, country, language))
+
+        except (KeyError, TypeError, ValueError, AttributeError) as error:
+            rejected_rows.append({"row": item, "error": repr(error)})
+            logger.error(
+                "Invalid customer row {}: {}".format(
+                    item.get("customer_id"), repr(error)))
+
+    return customer_rows, rejected_rows
+
+
+def copy_customer_rows(connection, customer_rows: List[Tuple]) -> int:
+    """COPY rows into a staging table and move the new ones to customer."""
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(customer_rows)
+    buffer.seek(0)
+
+    columns = ", ".join(CUSTOMER_COLUMNS)
+    cursor = connection.connection.cursor()
 
     try:
-        database_export_file = open(file_path, 'r')
-    except FileNotFoundError as error:
-        logger.error("File not found: %s", repr(error))
-        return
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS customer_import "
+            "(LIKE customer INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+        cursor.copy_expert(
+            "COPY customer_import ({}) FROM STDIN WITH (FORMAT csv)".format(
+                columns),
+            buffer)
+        cursor.execute(
+            "INSERT INTO customer ({0}) SELECT {0} FROM customer_import "
+            "ON CONFLICT DO NOTHING".format(columns))
+        row_statistics["statements"] += 3
+
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def insert_customer_rows(connection, customer_rows: List[Tuple]) -> int:
+    """Insert rows with one multi-row INSERT ... ON CONFLICT DO NOTHING."""
+
+    insert = INSERT_DIALECTS[connection.dialect.name]
+    statement = insert(Customer.__table__).values(
+        [dict(zip(CUSTOMER_COLUMNS, row)) for row in customer_rows]
+    ).on_conflict_do_nothing()
+
+    return connection.execute(statement).rowcount
+
+
+def write_customer_rows(customer_rows: List[Tuple]) -> int:
+    """Write validated rows in one transaction, returns the inserted count."""
+
+    if not customer_rows:
+        return 0
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            return copy_customer_rows(connection, customer_rows)
+
+        return insert_customer_rows(connection, customer_rows)
+
+
+def process_customer_block_bulk(list_of_dicts: List[Dict]) -> Tuple:
+    """Bulk insert a block of items and return its counters and rejects.
+
+    Existing and duplicated customers are skipped by the database, so the
+    block needs no existence check per row. Rows that fail validation are
+    returned apart and not counted as skipped.
+    """
+
+    customer_rows, rejected_rows = to_customer_rows(list_of_dicts)
+    inserted_rows = write_customer_rows(customer_rows)
+    skipped_rows = len(customer_rows) - inserted_rows
+
+    return inserted_rows, skipped_rows, rejected_rows
+
+
+def process_block(list_of_dicts: List[Dict], bulk: bool) -> Tuple:
+    """Process a block with the ORM or the bulk loader."""
+
+    if bulk:
+        return process_customer_block_bulk(list_of_dicts)
+
+    return process_customer_block(list_of_dicts, 0, 0)
+
+
+def split_byte_ranges(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges that start and end on a newline."""
+
+    with open(file_path, 'rb') as export_file:
+        size = os.fstat(export_file.fileno()).st_size
+
+        if size == 0:
+            return []
+
+        with mmap.mmap(
+                export_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            boundaries = [0]
+
+            for part in range(1, parts):
+                newline = mapped.find(b"\n", max(
+                    boundaries[-1], size * part // parts))
+                boundaries.append(size if newline == -1 else newline + 1)
+
+            boundaries.append(size)
+
+    return [
+        (start, end)
+        for start, end in zip(boundaries, boundaries[1:]) if start < end
+    ]
+
+
+def read_byte_range(
+        file_path: str, start: int, end: int) -> Iterator[Tuple[str, int]]:
+    """Generate the decoded lines of a byte range and where each one ends."""
+
+    with open(file_path, 'rb') as export_file, mmap.mmap(
+            export_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = start
+
+        while position < end:
+            newline = mapped.find(b"\n", position, end)
+            line_end = end if newline == -1 else newline + 1
+
+            yield mapped[position:line_end].decode("utf-8"), line_end
+
+            position = line_end
+
+
+class ImportCheckpoint:
+    """JSON file with the last committed byte offset of every byte range.
+
+    Workers update their own range under an exclusive lock and the file is
+    replaced atomically, so a crash never leaves a half written checkpoint.
+    """
 
-    for row in to_json_generator(database_export_file):
-        block_to_process.append(row)
+    def __init__(self, path: str):
+        self.path = path
 
-        counter += 1
-        if len(block_to_process) == chunks:
-            inserted_rows, skipped_rows = process_customer_block(
-                block_to_process, inserted_rows, skipped_rows)
+    def load(self) -> Dict:
+        """Return the saved state of every byte range."""
 
-            block_counter += block_counter
+        try:
+            with open(self.path, 'r') as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, range_key: str, state: Dict) -> None:
+        """Store the state of a byte range."""
+
+        with open(self.path + ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            checkpoint = self.load()
+            checkpoint[range_key] = state
+
+            temporary_path = self.path + ".tmp"
+            with open(temporary_path, 'w') as checkpoint_file:
+                json.dump(checkpoint, checkpoint_file)
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+
+            os.replace(temporary_path, self.path)
+
+    def remove(self) -> None:
+        """Delete the checkpoint once the import is complete."""
+
+        for path in (self.path, self.path + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def initialize_worker() -> None:
+    """Give a forked worker its own connections and session."""
+
+    global session
+
+    engine.dispose(close=False)
+    session = Session(engine)
+
+
+def commit_block(
+        block_to_process: List[Dict], rejected_rows: List[Dict],
+        offset: int, bulk: bool, state: Dict,
+        reject_path: str, range_key: str) -> None:
+    """Process a block and move the range state past its last row.
+
+    ``rejected_rows`` holds the rows of the block that were not valid JSON,
+    they are written to the reject file with the rows failing validation.
+    """
+
+    processed_rows = len(block_to_process) + len(rejected_rows)
+    inserted_rows, _, invalid_rows = process_block(block_to_process, bulk)
+    rejected_rows = rejected_rows + invalid_rows
+
+    write_rejected_rows(reject_path, rejected_rows, range_key, offset)
+    advance_state(
+        state, offset, processed_rows, inserted_rows, len(rejected_rows))
+
+
+def advance_state(
+        state: Dict, offset: int, processed_rows: int,
+        inserted_rows: int, rejected_rows: int) -> None:
+    """Move the range state past a committed block.
+
+    Processed rows are either inserted, rejected as invalid or skipped as
+    existing or duplicated customers.
+    """
+
+    state["offset"] = offset
+    state["block"] += 1
+    state["processed"] += processed_rows
+    state["inserted"] += inserted_rows
+    state["rejected"] += rejected_rows
+    state["skipped"] += processed_rows - inserted_rows - rejected_rows
+
+
+def log_progress(
+        range_key: str, state: Dict, end: int, started: float,
+        processed_rows: int, processed_bytes: int) -> None:
+    """Log throughput and estimated time left of a byte range."""
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    bytes_per_second = processed_bytes / elapsed
+    remaining_bytes = end - state["offset"]
+
+    logger.info((
+        "Range {} Block {} Rows/s: {:.0f} MB/s: {:.2f} ETA: {:.0f}s").format(
+            range_key, state["block"], processed_rows / elapsed,
+            bytes_per_second / 1_000_000,
+            remaining_bytes / bytes_per_second if bytes_per_second else 0))
+
+
+def get_statistics_baseline(state: Dict) -> Dict:
+    """Return process counters minus what a resumed range already counted."""
+
+    return {
+        key: value - state[key] for key, value in row_statistics.items()}
+
+
+def update_statistics(
+        state: Dict, baseline: Dict,
+        keys: Tuple[str, ...] | None = None) -> None:
+    """Copy the process counters gathered by a range into its state."""
+
+    for key in keys or row_statistics.keys():
+        state[key] = row_statistics[key] - baseline[key]
+
+
+def load_range_state(
+        checkpoint: ImportCheckpoint, range_key: str,
+        start: int, resume: bool) -> Dict:
+    """Return the initial state of a byte range, restored on resume."""
+
+    state = {
+        "offset": start,
+        "block": 0,
+        "processed": 0,
+        "inserted": 0,
+        "skipped": 0,
+        "rejected": 0,
+        "language_defaulted": 0,
+        "statements": 0,
+    }
+
+    if resume:
+        state.update(checkpoint.load().get(range_key, {}))
+
+        if state["offset"] > start:
+            logger.info(
+                "Resuming byte range {} at offset {} after block {}.".format(
+                    range_key, state["offset"], state["block"]))
+
+    return state
+
+
+def import_byte_range(
+        file_path: str, start: int, end: int, bulk: bool,
+        checkpoint_path: str, resume: bool, reject_path: str) -> Dict:
+    """Import the rows of a byte range and return its final state."""
+
+    checkpoint = ImportCheckpoint(checkpoint_path)
+    range_key = "{}-{}".format(start, end)
+    state = load_range_state(checkpoint, range_key, start, resume)
+
+    resumed_offset = state["offset"]
+    processed_on_resume = state["processed"]
+    baseline = get_statistics_baseline(state)
+    started = time.monotonic()
+    block_to_process = []
+    rejected_rows = []
+
+    for row, offset in read_byte_range(file_path, resumed_offset, end):
+        loaded_json = load_json_row(row)
+
+        if loaded_json is None:
+            rejected_rows.append(
+                {"row": row.rstrip("\n"), "error": "Invalid JSON"})
+            continue
+
+        block_to_process.append(loaded_json)
+
+        if len(block_to_process) == CHUNKS:
+            commit_block(
+                block_to_process, rejected_rows, offset, bulk, state,
+                reject_path, range_key)
+            update_statistics(state, baseline)
+            checkpoint.save(range_key, state)
             block_to_process = []
+            rejected_rows = []
+
+            log_progress(
+                range_key, state, end, started,
+                state["processed"] - processed_on_resume,
+                offset - resumed_offset)
+
+    if block_to_process or rejected_rows:
+        commit_block(
+            block_to_process, rejected_rows, end, bulk, state,
+            reject_path, range_key)
+        update_statistics(state, baseline)
+        checkpoint.save(range_key, state)
+
+    return state
+
+
+def write_rejected_rows(
+        reject_path: str, rejected_rows: List[Dict],
+        range_key: str, offset: int) -> None:
+    """Append the rejected rows of a block to the reject file in one write.
+
+    Every line records the byte range and block end offset it belongs to,
+    so a resume can drop the lines of blocks that were never checkpointed.
+    """
+
+    if not rejected_rows:
+        return
+
+    lines = "".join(
+        json.dumps(
+            {"range": range_key, "offset": offset, **rejected_row},
+            default=str) + "\n"
+        for rejected_row in rejected_rows)
+
+    with open(reject_path, 'a') as reject_file:
+        reject_file.write(lines)
+        reject_file.flush()
+        os.fsync(reject_file.fileno())
+
+
+def prune_rejected_rows(reject_path: str, checkpoint: Dict) -> None:
+    """Keep only the rejected rows of blocks covered by the checkpoint.
 
-            total_inserted_rows += inserted_rows
-            total_skipped_rows += skipped_rows
+    Blocks written after the last checkpoint of their range are imported
+    again on resume, their rejected rows would otherwise be listed twice.
+    """
 
-            logger.info((
-                "Items Procceced: {} Items "
-                "Inserted: {} Items Skipped: {}").format(
-                    counter, inserted_rows, skipped_rows))
+    if not os.path.exists(reject_path):
+        return
+
+    temporary_path = reject_path + ".tmp"
+
+    with open(reject_path, 'r') as reject_file, open(
+            temporary_path, 'w') as pruned_file:
+        for line in reject_file:
+            rejected_row = json.loads(line)
+            range_state = checkpoint.get(rejected_row["range"])
+
+            if (range_state is not None
+                    and rejected_row["offset"] <= range_state["offset"]):
+                pruned_file.write(line)
+
+    os.replace(temporary_path, reject_path)
+
+
+def reset_rejected_rows(
+        reject_path: str, checkpoint_path: str, resume: bool) -> None:
+    """Start a fresh reject file, or prune it to the checkpoint on resume."""
+
+    if resume:
+        prune_rejected_rows(
+            reject_path, ImportCheckpoint(checkpoint_path).load())
+    elif os.path.exists(reject_path):
+        os.remove(reject_path)
+
+
+def produce_customer_blocks(
+        file_path: str, start: int, end: int,
+        block_queue: queue.Queue, timings: Dict, errors: List) -> None:
+    """Parse and validate blocks of a byte range into a bounded queue.
 
-    database_export_file.close()
+    Each queued item holds the validated rows, the rejected rows, the number
+    of rows read, the rows that fell back to the default language and the
+    byte offset where the block ends. Nothing is written or counted here,
+    the writer applies a block only once it is committed. The end of the
+    range is marked with None, also after a failure so the writer never
+    waits forever.
+    """
+
+    block_to_process = []
+    rejected_rows = []
+    language_defaulted = row_statistics["language_defaulted"]
+
+    def put_block(offset: int) -> None:
+        started = time.perf_counter()
+        customer_rows, invalid_rows = to_customer_rows(block_to_process)
+        timings["validate_seconds"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        block_queue.put((
+            customer_rows, rejected_rows + invalid_rows,
+            len(block_to_process) + len(rejected_rows),
+            row_statistics["language_defaulted"] - language_defaulted,
+            offset))
+        timings["producer_blocked_seconds"] += time.perf_counter() - started
+
+    try:
+        for row, offset in read_byte_range(file_path, start, end):
+            started = time.perf_counter()
+            loaded_json = load_json_row(row)
+            timings["parse_seconds"] += time.perf_counter() - started
+
+            if loaded_json is None:
+                rejected_rows.append(
+                    {"row": row.rstrip("\n"), "error": "Invalid JSON"})
+                continue
+
+            block_to_process.append(loaded_json)
+
+            if len(block_to_process) == CHUNKS:
+                put_block(offset)
+                block_to_process = []
+                rejected_rows = []
+                language_defaulted = row_statistics["language_defaulted"]
+
+        if block_to_process or rejected_rows:
+            put_block(end)
+
+    except Exception as error:
+        errors.append(error)
+
+    finally:
+        block_queue.put(None)
+
+
+def import_byte_range_pipelined(
+        file_path: str, start: int, end: int, checkpoint_path: str,
+        resume: bool, reject_path: str, queue_depth: int) -> Dict:
+    """Import a byte range with overlapping parse and write stages.
+
+    A producer thread parses and validates blocks while this thread writes
+    the previous ones with the bulk loader. The rejected rows and counters
+    of a block are applied right before its checkpoint, so blocks parsed
+    ahead of a crash are not counted twice on resume. Returns the final
+    state with the timings of every stage.
+    """
+
+    checkpoint = ImportCheckpoint(checkpoint_path)
+    range_key = "{}-{}".format(start, end)
+    state = load_range_state(checkpoint, range_key, start, resume)
+
+    timings = {
+        "parse_seconds": 0.0,
+        "validate_seconds": 0.0,
+        "producer_blocked_seconds": 0.0,
+        "write_seconds": 0.0,
+        "writer_waiting_seconds": 0.0,
+        "queue_depth_total": 0,
+        "queue_depth_max": 0,
+        "queue_samples": 0,
+    }
+    errors = []
+    block_queue = queue.Queue(maxsize=queue_depth)
+
+    resumed_offset = state["offset"]
+    processed_on_resume = state["processed"]
+    baseline = get_statistics_baseline(state)
+    started = time.monotonic()
+
+    producer = threading.Thread(
+        target=produce_customer_blocks,
+        args=(file_path, resumed_offset, end, block_queue, timings, errors),
+        daemon=True)
+    producer.start()
+
+    while True:
+        queue_depth_sample = block_queue.qsize()
+        timings["queue_depth_total"] += queue_depth_sample
+        timings["queue_depth_max"] = max(
+            timings["queue_depth_max"], queue_depth_sample)
+        timings["queue_samples"] += 1
+
+        waiting = time.perf_counter()
+        item = block_queue.get()
+        timings["writer_waiting_seconds"] += time.perf_counter() - waiting
+
+        if item is None:
+            break
+
+        (customer_rows, rejected_rows, processed_rows,
+         language_defaulted, offset) = item
+
+        writing = time.perf_counter()
+        inserted_rows = write_customer_rows(customer_rows)
+        timings["write_seconds"] += time.perf_counter() - writing
+
+        write_rejected_rows(reject_path, rejected_rows, range_key, offset)
+
+        advance_state(
+            state, offset, processed_rows, inserted_rows, len(rejected_rows))
+        state["language_defaulted"] += language_defaulted
+        update_statistics(state, baseline, ("statements",))
+        checkpoint.save(range_key, state)
+
+        log_progress(
+            range_key, state, end, started,
+            state["processed"] - processed_on_resume,
+            offset - resumed_offset)
+
+    producer.join()
+
+    if errors:
+        raise errors[0]
+
+    update_statistics(state, baseline, ("statements",))
+    state["timings"] = timings
+
+    return state
+
+
+def log_pipeline_timings(results: List[Dict]) -> None:
+    """Log the stage timings and queue depth merged from every range."""
+
+    timings = {}
+    for result in results:
+        for key, value in result["timings"].items():
+            if key == "queue_depth_max":
+                timings[key] = max(timings.get(key, 0), value)
+            else:
+                timings[key] = timings.get(key, 0) + value
+
+    queue_samples = timings.pop("queue_samples", 0)
+    timings["queue_depth_mean"] = (
+        timings.pop("queue_depth_total", 0) / queue_samples
+        if queue_samples else 0)
+
+    logger.info("Pipeline stages: {}".format(", ".join(
+        "{}={:.2f}".format(key, value) for key, value in timings.items())))
+
+
+def import_customer_json_file(
+        file_path: str,
+        bulk: bool = typer.Option(
+            False, help="Load blocks with COPY or INSERT ON CONFLICT."),
+        workers: int = typer.Option(
+            1, min=1, help="Processes that import byte ranges in parallel."),
+        resume: bool = typer.Option(
+            False, help="Continue from the last committed checkpoint."),
+        checkpoint_path: str = typer.Option(
+            None, help="Checkpoint file, defaults to FILE_PATH.checkpoint."),
+        pipeline: bool = typer.Option(
+            False, help="Overlap parsing and validation with bulk writes."),
+        queue_depth: int = typer.Option(
+            4, min=1, help="Validated blocks buffered between stages."),
+        reject_path: str = typer.Option(
+            None,
+            help="Rejected rows file, defaults to FILE_PATH.rejects.jsonl."),
+        fast_decode: bool = typer.Option(
+            False, help="Decode rows with orjson when it is installed.")
+) -> Dict:
+    """Main function that triggers an import from a file."""
+
+    configure_decoder(fast_decode)
+    started = time.monotonic()
+
+    try:
+        byte_ranges = split_byte_ranges(file_path, workers)
+    except FileNotFoundError as error:
+        logger.error("File not found: %s", repr(error))
+        return {}
+
+    if workers > 1 and not bulk:
+        logger.info("Parallel import uses the bulk loader.")
+        bulk = True
+
+    checkpoint_path = checkpoint_path or file_path + ".checkpoint"
+
+    starts = [start for start, _ in byte_ranges]
+    ends = [end for _, end in byte_ranges]
+
+    reject_path = reject_path or file_path + ".rejects.jsonl"
+    reset_rejected_rows(reject_path, checkpoint_path, resume)
+
+    if pipeline:
+        import_function = import_byte_range_pipelined
+        arguments = (
+            repeat(file_path), starts, ends, repeat(checkpoint_path),
+            repeat(resume), repeat(reject_path), repeat(queue_depth))
+    else:
+        import_function = import_byte_range
+        arguments = (
+            repeat(file_path), starts, ends, repeat(bulk),
+            repeat(checkpoint_path), repeat(resume), repeat(reject_path))
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=initialize_worker) as executor:
+            results = list(executor.map(import_function, *arguments))
+    else:
+        results = list(map(import_function, *arguments))
+
+    ImportCheckpoint(checkpoint_path).remove()
+
+    counter = sum(result["processed"] for result in results)
+    total_inserted_rows = sum(result["inserted"] for result in results)
+    total_skipped_rows = sum(result["skipped"] for result in results)
+    total_rejected_rows = sum(result["rejected"] for result in results)
+    language_defaulted = sum(
+        result["language_defaulted"] for result in results)
+    statements = sum(result["statements"] for result in results)
 
     logger.info((
-        "Total Items Procceced: {} Total Items "
-        "Inserted: {} Total Items Skipped: {}").format(
-        counter, total_inserted_rows, total_skipped_rows))
+        "Total Items Procceced: {} Total Items Inserted: {} "
+        "Total Items Skipped: {} Total Items Rejected: {}").format(
+        counter, total_inserted_rows, total_skipped_rows,
+        total_rejected_rows))
+    logger.info(
+        "Language changed to English as default value for {} rows.".format(
+            language_defaulted))
+    logger.info("Database round trips: {}".format(statements))
+
+    if pipeline:
+        log_pipeline_timings(results)
+
+    return {
+        "processed": counter,
+        "inserted": total_inserted_rows,
+        "skipped": total_skipped_rows,
+        "rejected": total_rejected_rows,
+        "language_defaulted": language_defaulted,
+        "statements": statements,
+        "seconds": time.monotonic() - started,
+    }
 
 
 if __name__ == "__main__":
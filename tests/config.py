@@ -1,9 +1,16 @@
+from contextlib import contextmanager
+
 from starlette.testclient import TestClient
 
 from app.config import settings
+from app.database import record_statements
 from app.main import create_application
 
 
+if not settings.INTERNAL_API_TOKEN:
+    settings.INTERNAL_API_TOKEN = "internal-test-token"
+
+
 def get_testing_client() -> TestClient:
     """Return Test Client for Fast Api."""
 
@@ -11,3 +18,23 @@ def get_testing_client() -> TestClient:
     client = TestClient(app)
 
     return client
+
+
+def get_internal_headers() -> dict:
+    """Return the headers the internal endpoints require."""
+
+    return {"x-internal-token": settings.INTERNAL_API_TOKEN}
+
+
+@contextmanager
+def assert_statement_budget(budget: int):
+    """Fail when the block executes more database statements than budget."""
+
+    with record_statements() as recorder:
+        yield recorder
+
+    executed = "\n".join(statement for statement, _ in recorder.statements)
+
+    assert recorder.count <= budget, (
+        f"{recorder.count} statements executed, budget is {budget}:\n"
+        f"{executed}")
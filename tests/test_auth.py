@@ -1,4 +1,48 @@
-from tests.config import get_testing_client
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Request
+from jose import JWTError
+
+from app.api.auth.controllers import (
+    UserController,
+    credential_version_cache,
+    hash_refresh_token,
+    principal_cache,
+    prune_refresh_tokens,
+    token_cache
+)
+from sqlmodel import Session, select
+
+from app.config import jwt_settings, login_rate_limit_settings, JWTSettings
+from app.database import engine
+from app.utils.ratelimit import TokenBucketStore
+from app.api.auth.limits import (
+    LoginRateLimiter,
+    get_token_bucket_store,
+    get_trusted_proxies,
+    login_rate_limiter
+)
+from app.api.auth.tokens import (
+    TokenConfigurationError,
+    TokenError,
+    create_token_service,
+    generate_key_pair
+)
+from app.api.auth.models import AuthUser, RefreshToken
+from app.api.auth.schemas import AuthPrincipal
+from app.api.auth.hashing import (
+    PasswordHashingService,
+    configure_bcrypt_rounds,
+    get_bcrypt_min_rounds,
+    get_bcrypt_rounds,
+    hash_password,
+    pwd_context
+)
+from tests.config import assert_statement_budget, get_testing_client
 
 
 client = get_testing_client()
@@ -128,3 +172,535 @@ def test_authenticated_reset_password() -> None:
     assert response.status_code == 200
     expected_detail = "New Credentials Created for sbahtgijwovhje@gmail.com."
     assert json_response["message"] == expected_detail
+    assert principal_cache.get("sbahtgijwovhje@gmail.com") is None
+
+
+def test_reset_password_of_missing_user() -> None:
+    """Test a cached principal without a stored user is unauthorized."""
+
+    username = "missing-user@example.com"
+    principal_cache.set(username, AuthPrincipal(
+        id=0, username=username, is_active=True, is_superuser=False))
+    access_token = UserController().create_access_token(
+        data={"sub": username})
+
+    try:
+        response = client.post(
+            "/auth/reset-password",
+            headers={
+                "client-version": "3.2.1",
+                "Authorization": f"Bearer {access_token}"
+            },
+            json={
+                "old_password": "password123",
+                "new_password": "password321"
+            }
+        )
+    finally:
+        principal_cache.invalidate(username)
+
+    assert response.status_code == 401
+
+
+def test_password_hashing_pool_rejects_when_full() -> None:
+    """Test hashing pool answers 503 once the queue is full."""
+
+    hashing_service = PasswordHashingService(
+        enabled=True, executor="thread", max_workers=1, queue_depth=0)
+
+    assert asyncio.run(hashing_service.verify(
+        "password123", hash_password("password123")))
+
+    hashing_service._slots.acquire()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(hashing_service.hash("password123"))
+
+    hashing_service.shutdown()
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+    assert hashing_service.rejected == 1
+
+
+def test_password_hashing_pool_holds_slot_of_cancelled_call() -> None:
+    """Test a cancelled request keeps its slot until bcrypt is done."""
+
+    hashing_service = PasswordHashingService(
+        enabled=True, executor="thread", max_workers=1, queue_depth=0)
+    started = threading.Event()
+    finish = threading.Event()
+
+    def blocking_call() -> bool:
+        started.set()
+        return finish.wait(5)
+
+    async def cancel_running_call() -> None:
+        task = asyncio.create_task(hashing_service.run(blocking_call))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        with pytest.raises(HTTPException):
+            await hashing_service.run(blocking_call)
+
+    try:
+        asyncio.run(cancel_running_call())
+    finally:
+        finish.set()
+
+    assert hashing_service._slots.acquire(timeout=5)
+
+    hashing_service.shutdown()
+
+
+def test_access_token_claims_are_cached() -> None:
+    """Test decoded token claims are reused and expire with the token."""
+
+    user_controller = UserController()
+    access_token = user_controller.create_access_token(
+        data={"sub": "sbahtgijwovhje@gmail.com"},
+        expires_delta=timedelta(minutes=5))
+
+    hits = token_cache.hits
+
+    first_payload = user_controller.decode_access_token(access_token)
+    second_payload = user_controller.decode_access_token(access_token)
+
+    assert first_payload == second_payload
+    assert token_cache.hits == hits + 1
+
+    expired_token = user_controller.create_access_token(
+        data={"sub": "sbahtgijwovhje@gmail.com"},
+        expires_delta=timedelta(minutes=-5))
+
+    with pytest.raises(JWTError):
+        user_controller.decode_access_token(expired_token)
+
+
+def test_bcrypt_cost_is_only_upgraded() -> None:
+    """Test hashes within the accepted costs are not rehashed."""
+
+    rounds = get_bcrypt_rounds()
+    min_rounds = get_bcrypt_min_rounds()
+
+    try:
+        configure_bcrypt_rounds(5)
+        higher_cost_hash = hash_password("password123")
+        configure_bcrypt_rounds(4)
+        lower_cost_hash = hash_password("password123")
+
+        assert not pwd_context.needs_update(higher_cost_hash)
+
+        configure_bcrypt_rounds(5, min_rounds=4)
+
+        assert not pwd_context.needs_update(lower_cost_hash)
+
+        configure_bcrypt_rounds(5)
+
+        assert pwd_context.needs_update(lower_cost_hash)
+    finally:
+        configure_bcrypt_rounds(rounds, min_rounds=min_rounds)
+
+
+def test_login_rehashes_outdated_password_cost() -> None:
+    """Test login upgrades passwords hashed with another bcrypt cost."""
+
+    rounds = get_bcrypt_rounds()
+    configure_bcrypt_rounds(4)
+
+    try:
+        client.post(
+            "/auth/recover-password",
+            headers={"client-version": "3.3.1"},
+            json={
+                "recovery_code": 1631959404,
+                "email": "sbahtgijwovhje@gmail.com",
+                "password": "password123"
+            }
+        )
+    finally:
+        configure_bcrypt_rounds(rounds)
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    assert response.status_code == 200
+
+    with Session(engine) as session:
+        user = session.exec(select(AuthUser).where(
+            AuthUser.username == "sbahtgijwovhje@gmail.com")).one()
+
+    assert user.password.startswith(f"$2b${rounds:02d}$")
+
+
+def test_login_attempts_are_rate_limited() -> None:
+    """Test failed logins of a username are shed before authentication."""
+
+    for _ in range(login_rate_limit_settings.LOGIN_USERNAME_BURST):
+        response = client.post(
+            "/auth/login",
+            headers={"client-version": "3.2.1"},
+            data={"username": "limited@example.com", "password": "wrong"}
+        )
+
+        assert response.status_code == 401
+
+    shed = login_rate_limiter.stats()["username"]["shed"]
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={"username": "Limited@example.com", "password": "wrong"}
+    )
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert login_rate_limiter.stats()["username"]["shed"] == shed + 1
+
+    login_rate_limiter.username_store.clear()
+
+
+def test_login_rate_limit_refuses_zero_rate(monkeypatch) -> None:
+    """Test a refill rate of 0 is refused while the limiter is enabled."""
+
+    monkeypatch.setattr(
+        login_rate_limit_settings, "LOGIN_RATE_LIMIT_ENABLED", True)
+
+    with pytest.raises(ValueError, match="LOGIN_RATE_LIMIT_ENABLED=false"):
+        get_token_bucket_store(5, 0)
+
+    monkeypatch.setattr(
+        login_rate_limit_settings, "LOGIN_RATE_LIMIT_ENABLED", False)
+
+    assert get_token_bucket_store(5, 0).capacity == 5
+
+
+def test_login_client_ip_behind_trusted_proxies() -> None:
+    """Test X-Forwarded-For is only honoured from trusted proxies."""
+
+    rate_limiter = LoginRateLimiter(
+        enabled=True,
+        username_store=login_rate_limiter.username_store,
+        ip_store=login_rate_limiter.ip_store,
+        trusted_proxies=get_trusted_proxies("10.0.0.0/8, 127.0.0.1"))
+
+    def get_request(peer: str, forwarded_for: str | None = None) -> Request:
+        headers = []
+
+        if forwarded_for is not None:
+            headers.append((b"x-forwarded-for", forwarded_for.encode()))
+
+        return Request({
+            "type": "http", "headers": headers, "client": (peer, 50000)})
+
+    assert rate_limiter.get_client_ip(
+        get_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+    assert rate_limiter.get_client_ip(
+        get_request("10.0.0.2", "198.51.100.1")) == "198.51.100.1"
+    assert rate_limiter.get_client_ip(get_request(
+        "10.0.0.2", "6.6.6.6, 198.51.100.1, 10.1.2.3")) == "198.51.100.1"
+    assert rate_limiter.get_client_ip(
+        get_request("127.0.0.1", "10.1.2.3")) == "10.1.2.3"
+    assert rate_limiter.get_client_ip(get_request("10.0.0.2")) == "10.0.0.2"
+
+
+def test_token_buckets_refill_and_sweep() -> None:
+    """Test token buckets refill over time and full ones are swept."""
+
+    store = TokenBucketStore(capacity=2, rate=1000, shards=1, sweep_interval=0)
+
+    assert store.acquire("key") == 0
+    assert store.acquire("key") == 0
+    assert 0 < store.acquire("key") <= 0.001
+
+    store.release("key")
+    assert store.acquire("key") == 0
+
+    time.sleep(0.01)
+    store.acquire("other")
+
+    assert store.stats()["swept"] >= 1
+
+
+@pytest.mark.parametrize("backend, algorithm", [
+    ("jose", "HS256"),
+    ("jose", "RS256"),
+    ("pyjwt", "RS256"),
+    ("pyjwt", "EdDSA"),
+])
+def test_token_service_key_rotation(tmp_path, backend, algorithm) -> None:
+    """Test tokens of a retired key still verify after a rotation."""
+
+    def get_key_settings(key_id: str, **keys) -> JWTSettings:
+        if algorithm.startswith("HS"):
+            keys = {"SECRET_KEY": key_id * 8, **keys}
+        else:
+            private_pem, public_pem = generate_key_pair(algorithm)
+            (tmp_path / f"{key_id}.pem").write_bytes(private_pem)
+            (tmp_path / f"{key_id}.pub.pem").write_bytes(public_pem)
+            keys = {
+                "JWT_PRIVATE_KEY_PATH": str(tmp_path / f"{key_id}.pem"),
+                "JWT_PUBLIC_KEY_PATH": str(tmp_path / f"{key_id}.pub.pem"),
+                **keys
+            }
+
+        return jwt_settings.model_copy(update={
+            "JWT_BACKEND": backend,
+            "ALGORITHM": algorithm,
+            "JWT_KEY_ID": key_id,
+            **keys
+        })
+
+    old_settings = get_key_settings("old")
+    old_token = create_token_service(old_settings).encode(
+        {"sub": "sbahtgijwovhje@gmail.com"})
+
+    retired_key = (
+        old_settings.SECRET_KEY if algorithm.startswith("HS")
+        else old_settings.JWT_PUBLIC_KEY_PATH)
+    new_service = create_token_service(get_key_settings(
+        "new", JWT_VERIFICATION_KEYS={"old": retired_key}))
+    new_token = new_service.encode({"sub": "sbahtgijwovhje@gmail.com"})
+
+    assert new_service.decode(old_token)["sub"] == "sbahtgijwovhje@gmail.com"
+    assert new_service.decode(new_token)["sub"] == "sbahtgijwovhje@gmail.com"
+
+    unknown_service = create_token_service(get_key_settings("next"))
+
+    with pytest.raises(TokenError):
+        unknown_service.decode(old_token)
+
+
+def test_token_service_configuration_errors(tmp_path) -> None:
+    """Test unusable token settings fail with a clear error."""
+
+    private_pem, _ = generate_key_pair("RS256")
+    (tmp_path / "key.pem").write_bytes(private_pem)
+
+    with pytest.raises(TokenConfigurationError, match="JWT_PUBLIC_KEY_PATH"):
+        create_token_service(jwt_settings.model_copy(update={
+            "ALGORITHM": "RS256",
+            "JWT_PRIVATE_KEY_PATH": str(tmp_path / "key.pem"),
+            "JWT_PUBLIC_KEY_PATH": None,
+        }))
+
+    with pytest.raises(TokenConfigurationError, match="JWT_BACKEND"):
+        create_token_service(
+            jwt_settings.model_copy(update={"JWT_BACKEND": "unknown"}))
+
+    eddsa_pem, eddsa_public_pem = generate_key_pair("EdDSA")
+    (tmp_path / "eddsa.pem").write_bytes(eddsa_pem)
+    (tmp_path / "eddsa.pub.pem").write_bytes(eddsa_public_pem)
+
+    with pytest.raises(TokenConfigurationError, match="EdDSA"):
+        create_token_service(jwt_settings.model_copy(update={
+            "JWT_BACKEND": "jose",
+            "ALGORITHM": "EdDSA",
+            "JWT_PRIVATE_KEY_PATH": str(tmp_path / "eddsa.pem"),
+            "JWT_PUBLIC_KEY_PATH": str(tmp_path / "eddsa.pub.pem"),
+        }))
+
+
+def test_refresh_token_rotation(monkeypatch) -> None:
+    """Test refresh tokens rotate, detect reuse and die on password reset."""
+
+    monkeypatch.setattr(jwt_settings, "REFRESH_TOKENS_ENABLED", True)
+    monkeypatch.setattr(jwt_settings, "ACCESS_TOKEN_CLAIMS_ENABLED", False)
+
+    def login() -> dict:
+        return client.post(
+            "/auth/login",
+            headers={"client-version": "3.2.1"},
+            data={
+                "username": "sbahtgijwovhje@gmail.com",
+                "password": "password123"
+            }
+        ).json()
+
+    def refresh(refresh_token: str):
+        return client.post(
+            "/auth/refresh",
+            headers={"client-version": "3.2.1"},
+            json={"refresh_token": refresh_token}
+        )
+
+    first_refresh_token = login()["refresh_token"]
+
+    with assert_statement_budget(3):
+        response = refresh(first_refresh_token)
+
+    assert response.status_code == 200
+    second_refresh_token = response.json()["refresh_token"]
+    assert response.json()["access_token"]
+    assert second_refresh_token != first_refresh_token
+
+    assert refresh(first_refresh_token).status_code == 401
+    assert refresh(second_refresh_token).status_code == 401
+
+    tokens = login()
+
+    response = client.post(
+        "/auth/reset-password",
+        headers={
+            "client-version": "3.2.1",
+            "Authorization": f"Bearer {tokens['access_token']}"
+        },
+        json={
+            "old_password": "password123",
+            "new_password": "password123"
+        }
+    )
+
+    assert response.status_code == 200
+    assert refresh(tokens["refresh_token"]).status_code == 401
+
+    refresh_token = login()["refresh_token"]
+
+    with Session(engine) as session:
+        user = session.exec(select(AuthUser).where(
+            AuthUser.username == "sbahtgijwovhje@gmail.com")).one()
+        user.is_active = False
+        session.add(user)
+        session.commit()
+
+        try:
+            assert refresh(refresh_token).status_code == 401
+        finally:
+            user.is_active = True
+            session.add(user)
+            session.commit()
+
+
+def test_inactive_users_cannot_log_in() -> None:
+    """Test a deactivated user gets no new tokens from a password login."""
+
+    def login():
+        return client.post(
+            "/auth/login",
+            headers={"client-version": "3.2.1"},
+            data={
+                "username": "sbahtgijwovhje@gmail.com",
+                "password": "password123"
+            }
+        )
+
+    assert login().status_code == 200
+
+    with Session(engine) as session:
+        user = session.exec(select(AuthUser).where(
+            AuthUser.username == "sbahtgijwovhje@gmail.com")).one()
+        user.is_active = False
+        session.add(user)
+        session.commit()
+
+        try:
+            assert login().status_code == 401
+        finally:
+            user.is_active = True
+            session.add(user)
+            session.commit()
+
+
+def test_expired_refresh_tokens_are_pruned(monkeypatch) -> None:
+    """Test pruning deletes expired refresh tokens and keeps live ones."""
+
+    monkeypatch.setattr(jwt_settings, "REFRESH_TOKENS_ENABLED", True)
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+    live_hash = hash_refresh_token(response.json()["refresh_token"])
+
+    with Session(engine) as session:
+        user_id = session.exec(select(RefreshToken.user_id).where(
+            RefreshToken.token_hash == live_hash)).one()
+        session.add(RefreshToken(
+            token_hash="expired", family_id="expired", user_id=user_id,
+            expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+    assert prune_refresh_tokens() >= 1
+
+    with Session(engine) as session:
+        token_hashes = session.exec(select(RefreshToken.token_hash)).all()
+
+    assert "expired" not in token_hashes
+    assert live_hash in token_hashes
+
+
+def test_claims_principal_follows_the_database(monkeypatch) -> None:
+    """Test claims tokens follow flag and password changes in the database."""
+
+    monkeypatch.setattr(jwt_settings, "ACCESS_TOKEN_CLAIMS_ENABLED", True)
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    user_controller = UserController()
+
+    with Session(engine) as session:
+        principal = user_controller.get_current_user(access_token, session)
+
+        assert not principal.is_superuser
+
+        user = session.exec(select(AuthUser).where(
+            AuthUser.username == "sbahtgijwovhje@gmail.com")).one()
+        user.is_superuser = True
+        session.add(user)
+        session.commit()
+
+        credential_version_cache.clear()
+        principal = user_controller.get_current_user(access_token, session)
+
+        assert principal.is_superuser
+
+        user.is_superuser = False
+        user.credential_version += 1
+        session.add(user)
+        session.commit()
+
+        credential_version_cache.clear()
+
+        with pytest.raises(HTTPException):
+            user_controller.get_current_user(access_token, session)
@@ -1,4 +1,14 @@
-from tests.config import get_testing_client
+from sqlmodel import Session, update
+
+from app.config import jwt_settings, settings
+from app.database import engine
+from app.api.customers.controllers import customer_profile_cache
+from app.api.customers.models import Customer
+from tests.config import (
+    assert_statement_budget,
+    get_internal_headers,
+    get_testing_client
+)
 
 
 client = get_testing_client()
@@ -59,4 +69,289 @@ def test_customer_authenticated_endpoint() -> None:
     assert "email" in json_response
     assert "country" in json_response
     assert "language" in json_response
- 
\ No newline at end of file
+ 
+
+def test_customer_update_language() -> None:
+    """Test edit-data endpoint from customers."""
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+
+    response = client.put(
+        "/customers/me/edit-data",
+        headers={
+            "client-version": "3.2.1",
+            "Authorization": f"Bearer {access_token}"
+        },
+        json={"language": "de"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["language"] == "de"
+
+    response = client.get(
+        "/customers/me",
+        headers={
+            "client-version": "3.2.1",
+            "Authorization": f"Bearer {access_token}"
+        }
+    )
+
+    assert response.status_code == 200
+    assert response.json()["language"] == "de"
+
+
+def test_customer_claims_mode(monkeypatch) -> None:
+    """Test claims tokens skip the AuthUser lookup until a password reset."""
+
+    monkeypatch.setattr(jwt_settings, "ACCESS_TOKEN_CLAIMS_ENABLED", True)
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    headers = {
+        "client-version": "3.2.1",
+        "Authorization": f"Bearer {access_token}"
+    }
+
+    customer_profile_cache.clear()
+
+    with assert_statement_budget(1) as recorder:
+        response = client.get("/customers/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "sbahtgijwovhje@gmail.com"
+    assert "authuser" not in recorder.statements[0][0]
+
+    response = client.post(
+        "/auth/reset-password",
+        headers=headers,
+        json={
+            "old_password": "password123",
+            "new_password": "password123"
+        }
+    )
+
+    assert response.status_code == 200
+
+    response = client.get("/customers/me", headers=headers)
+
+    assert response.status_code == 401
+
+
+def test_customer_profile_cache() -> None:
+    """Test profiles are served from the cache and written through on edit."""
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    headers = {
+        "client-version": "3.2.1",
+        "Authorization": f"Bearer {access_token}"
+    }
+
+    customer_profile_cache.clear()
+
+    with assert_statement_budget(1):
+        response = client.get("/customers/me", headers=headers)
+
+    assert response.status_code == 200
+
+    with assert_statement_budget(1) as recorder:
+        cached_response = client.get("/customers/me", headers=headers)
+
+    assert cached_response.json() == response.json()
+    assert "SELECT customer.version " in recorder.statements[0][0]
+
+    for language in ("en", "de"):
+        response = client.put(
+            "/customers/me/edit-data",
+            headers=headers,
+            json={"language": language}
+        )
+
+        assert response.status_code == 200
+
+        with assert_statement_budget(1):
+            response = client.get("/customers/me", headers=headers)
+
+        assert response.json()["language"] == language
+
+    response = client.get(
+        "/internal/customer-profile-cache", headers=get_internal_headers())
+    stats = response.json()
+
+    assert response.status_code == 200
+    assert stats["size"] == 1
+    assert stats["hit_ratio"] > 0
+    assert stats["memory_bytes"] > 0
+
+
+def test_customer_profile_cache_edited_elsewhere(monkeypatch) -> None:
+    """Test a profile edited by another worker is not served from cache."""
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    headers = {
+        "client-version": "3.2.1",
+        "Authorization": f"Bearer {access_token}"
+    }
+
+    response = client.put(
+        "/customers/me/edit-data", headers=headers, json={"language": "en"})
+    etag = response.headers["etag"]
+
+    assert response.status_code == 200
+
+    with Session(engine) as session:
+        session.exec(
+            update(Customer)
+            .where(Customer.email == "sbahtgijwovhje@gmail.com")
+            .values(language="de", version=Customer.version + 1))
+        session.commit()
+
+    response = client.get(
+        "/customers/me", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["language"] == "de"
+    assert response.headers["etag"] != etag
+
+    monkeypatch.setattr(settings, "CUSTOMER_PROFILE_CACHE_VALIDATE", False)
+
+    with assert_statement_budget(0):
+        response = client.get("/customers/me", headers=headers)
+
+    assert response.json()["language"] == "de"
+
+
+def test_customer_etags() -> None:
+    """Test conditional reads and updates of the customer profile."""
+
+    client.post(
+        "/auth/recover-password",
+        headers={"client-version": "3.3.1"},
+        json={
+            "recovery_code": 1631959404,
+            "email": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    headers = {
+        "client-version": "3.2.1",
+        "Authorization": f"Bearer {access_token}"
+    }
+
+    response = client.get("/customers/me", headers=headers)
+    etag = response.headers["etag"]
+
+    assert response.status_code == 200
+
+    with assert_statement_budget(1):
+        response = client.get(
+            "/customers/me", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.put(
+        "/customers/me/edit-data",
+        headers={**headers, "If-Match": etag},
+        json={"language": "de"}
+    )
+    new_etag = response.headers["etag"]
+
+    assert response.status_code == 200
+    assert new_etag != etag
+
+    response = client.put(
+        "/customers/me/edit-data",
+        headers={**headers, "If-Match": etag},
+        json={"language": "en"}
+    )
+
+    assert response.status_code == 412
+
+    response = client.get(
+        "/customers/me", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == new_etag
+    assert response.json()["language"] == "de"
+
+    response = client.get(
+        "/customers/me", headers={**headers, "If-None-Match": new_etag})
+
+    assert response.status_code == 304
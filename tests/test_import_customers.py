@@ -0,0 +1,259 @@
+import json
+import uuid
+
+import pytest
+from sqlmodel import Session, delete
+
+from app.database import engine
+from app.api.customers.models import Customer
+from scripts import import_customers
+
+
+IMPORT_OPTIONS = {
+    "bulk": True,
+    "workers": 1,
+    "resume": False,
+    "checkpoint_path": None,
+    "pipeline": False,
+    "queue_depth": 4,
+    "reject_path": None,
+    "fast_decode": False,
+}
+
+
+def write_export(file_path, rows: int) -> dict:
+    """Write an export with invalid rows and return what it contains."""
+
+    expected = {"customer_ids": [], "language_defaulted": 0, "rejected": 0}
+
+    with open(file_path, 'w') as export_file:
+        for index in range(rows):
+            customer_id = str(uuid.uuid4())
+            language = "en"
+            email = "customer{}@example.com".format(index)
+
+            if index % 7 == 0:
+                language = "fr"
+                expected["language_defaulted"] += 1
+
+            if index % 11 == 5:
+                email = "not-an-email"
+                expected["rejected"] += 1
+            else:
+                expected["customer_ids"].append(customer_id)
+
+            if index % 13 == 12:
+                export_file.write('{"customer_id": "broken row\n')
+                expected["rejected"] += 1
+
+            export_file.write(json.dumps({
+                "customer_id": customer_id,
+                "email": email,
+                "country": "DE",
+                "language": language,
+            }) + "\n")
+
+    return expected
+
+
+def delete_customers(customer_ids: list) -> None:
+    """Remove the customers imported by a test."""
+
+    with Session(engine) as session:
+        session.exec(delete(Customer).where(
+            Customer.customer_id.in_(
+                [uuid.UUID(customer_id) for customer_id in customer_ids])))
+        session.commit()
+
+
+def test_split_byte_ranges_on_line_boundaries(tmp_path) -> None:
+    """Test ranges cover the file and never split a line."""
+
+    file_path = tmp_path / "export.json"
+    lines = [b"a" * length + b"\n" for length in (3, 40, 1, 7, 25)]
+    file_path.write_bytes(b"".join(lines) + b"last line without newline")
+    size = file_path.stat().st_size
+
+    for parts in (1, 2, 3, 6, 50):
+        byte_ranges = import_customers.split_byte_ranges(
+            str(file_path), parts)
+
+        assert byte_ranges[0][0] == 0
+        assert byte_ranges[-1][1] == size
+        assert all(
+            end == next_start
+            for (_, end), (next_start, _) in zip(
+                byte_ranges, byte_ranges[1:]))
+
+        rows = [
+            row
+            for start, end in byte_ranges
+            for row, _ in import_customers.read_byte_range(
+                str(file_path), start, end)
+        ]
+
+        assert rows == [line.decode() for line in lines] + [
+            "last line without newline"]
+
+    empty_path = tmp_path / "empty.json"
+    empty_path.write_bytes(b"")
+
+    assert import_customers.split_byte_ranges(str(empty_path), 4) == []
+
+
+def test_read_byte_range_offsets(tmp_path) -> None:
+    """Test every line is returned with the offset where it ends."""
+
+    file_path = tmp_path / "export.json"
+    file_path.write_bytes(b"first\nsecond\nthird")
+
+    rows = list(import_customers.read_byte_range(str(file_path), 6, 18))
+
+    assert rows == [("second\n", 13), ("third", 18)]
+
+
+def test_to_customer_rows_validation() -> None:
+    """Test rows are validated into tuples and invalid ones rejected."""
+
+    customer_id = str(uuid.uuid4())
+    valid_row = {
+        "customer_id": customer_id,
+        "email": "customer@example.com",
+        "country": "DE",
+        "language": "de",
+    }
+    invalid_rows = [
+        {**valid_row, "email": "customer.example.com"},
+        {**valid_row, "email": None},
+        {**valid_row, "country": ""},
+        {**valid_row, "language": "fr"},
+        {**valid_row, "customer_id": "not-a-uuid"},
+        {key: value for key, value in valid_row.items() if key != "email"},
+    ]
+
+    customer_rows, rejected_rows = import_customers.to_customer_rows(
+        [valid_row] + invalid_rows)
+
+    assert customer_rows == [
+        (customer_id, "customer@example.com", "DE", "de")]
+    assert [rejected["row"] for rejected in rejected_rows] == invalid_rows
+
+
+def test_import_checkpoint(tmp_path) -> None:
+    """Test checkpoint ranges are saved independently and removed."""
+
+    checkpoint = import_customers.ImportCheckpoint(
+        str(tmp_path / "export.checkpoint"))
+
+    assert checkpoint.load() == {}
+
+    checkpoint.save("0-100", {"offset": 50})
+    checkpoint.save("100-200", {"offset": 150})
+    checkpoint.save("0-100", {"offset": 100})
+
+    assert checkpoint.load() == {
+        "0-100": {"offset": 100}, "100-200": {"offset": 150}}
+
+    checkpoint.remove()
+
+    assert checkpoint.load() == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_customer_rows_skips_existing_customers() -> None:
+    """Test duplicated and existing customers are skipped by the database."""
+
+    customer_ids = [str(uuid.uuid4()) for _ in range(3)]
+    customer_rows = [
+        (customer_id, "customer{}@example.com".format(index), "DE", "en")
+        for index, customer_id in enumerate(customer_ids)
+    ]
+
+    try:
+        assert import_customers.write_customer_rows(
+            customer_rows + customer_rows[:1]) == 3
+        assert import_customers.write_customer_rows(customer_rows) == 0
+    finally:
+        delete_customers(customer_ids)
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="COPY needs PostgreSQL.")
+def test_copy_customer_rows() -> None:
+    """Test COPY through the staging table skips existing customers."""
+
+    customer_ids = [str(uuid.uuid4()) for _ in range(3)]
+    customer_rows = [
+        (customer_id, "copy{}@example.com".format(index), "DE", "de")
+        for index, customer_id in enumerate(customer_ids)
+    ]
+
+    try:
+        with engine.begin() as connection:
+            assert import_customers.copy_customer_rows(
+                connection, customer_rows[:2]) == 2
+
+        with engine.begin() as connection:
+            assert import_customers.copy_customer_rows(
+                connection, customer_rows) == 1
+    finally:
+        delete_customers(customer_ids)
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_import_resume_after_crash(tmp_path, monkeypatch, pipeline) -> None:
+    """Test a resumed import counts every row and rejected row once."""
+
+    monkeypatch.setattr(import_customers, "CHUNKS", 10)
+
+    file_path = str(tmp_path / "export.json")
+    reject_path = str(tmp_path / "export.rejects.jsonl")
+    expected = write_export(file_path, 60)
+    options = {
+        **IMPORT_OPTIONS, "pipeline": pipeline, "reject_path": reject_path}
+
+    write_customer_rows = import_customers.write_customer_rows
+    writes = []
+
+    def crash_on_third_write(customer_rows):
+        writes.append(len(customer_rows))
+
+        if len(writes) == 3:
+            raise RuntimeError("Simulated crash")
+
+        return write_customer_rows(customer_rows)
+
+    monkeypatch.setattr(
+        import_customers, "write_customer_rows", crash_on_third_write)
+
+    with pytest.raises(RuntimeError):
+        import_customers.import_customer_json_file(file_path, **options)
+
+    monkeypatch.setattr(
+        import_customers, "write_customer_rows", write_customer_rows)
+
+    try:
+        summary = import_customers.import_customer_json_file(
+            file_path, **{**options, "resume": True})
+
+        assert summary["inserted"] == len(expected["customer_ids"])
+        assert summary["rejected"] == expected["rejected"]
+        assert summary["skipped"] == 0
+        assert summary["processed"] == (
+            summary["inserted"] + summary["rejected"])
+        assert summary["language_defaulted"] == expected["language_defaulted"]
+
+        with open(reject_path) as reject_file:
+            assert len(reject_file.readlines()) == expected["rejected"]
+
+        with Session(engine) as session:
+            imported = session.exec(
+                Customer.__table__.select().where(
+                    Customer.customer_id.in_([
+                        uuid.UUID(customer_id)
+                        for customer_id in expected["customer_ids"]]))
+            ).all()
+
+        assert len(imported) == len(expected["customer_ids"])
+    finally:
+        delete_customers(expected["customer_ids"])
@@ -0,0 +1,261 @@
+import pytest
+from starlette.testclient import TestClient
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session
+
+from app.config import settings
+from app.database import engine
+from app.main import create_application
+from app.utils.metrics import request_timings
+from app.api.auth.hashing import hash_password, password_hasher
+from app.api.auth.models import AuthUser
+from app.api.common.membership import (
+    MembershipFilter,
+    membership_filter as app_membership_filter
+)
+from tests.config import get_internal_headers, get_testing_client
+
+
+client = get_testing_client()
+
+
+def test_pool_statistics() -> None:
+    """Test pool statistics endpoint."""
+
+    client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijw2ovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    response = client.get("/internal/pool-stats")
+
+    assert response.status_code == 403
+
+    response = client.get(
+        "/internal/pool-stats",
+        headers={"x-internal-token": "wrong-token"})
+
+    assert response.status_code == 403
+
+    response = client.get(
+        "/internal/pool-stats", headers=get_internal_headers())
+
+    json_response = response.json()
+    pool_statistics = json_response[
+        "async" if settings.ASYNC_DATABASE else "sync"]
+
+    assert response.status_code == 200
+    assert pool_statistics["checked_out"] == 0
+    assert pool_statistics["timeouts"] == 0
+    assert pool_statistics["wait_time_seconds"]["count"] >= 1
+
+
+def test_failed_statements_are_not_timed() -> None:
+    """Test a failing statement leaves no timer behind on its connection."""
+
+    timings = {}
+    token = request_timings.set(timings)
+
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(DBAPIError):
+                connection.execute(text("SELECT * FROM missing_table"))
+
+            connection.rollback()
+            connection.execute(text("SELECT 1"))
+
+            assert not any(
+                isinstance(value, list) for value in connection.info.values())
+    finally:
+        request_timings.reset(token)
+
+    assert timings["db"][1] == 1
+
+
+def test_metrics_and_server_timing() -> None:
+    """Test route metrics and the Server-Timing header."""
+
+    default_settings = settings.model_copy(
+        update={"SERVER_TIMING_ENABLED": False})
+    default_client = TestClient(create_application(default_settings))
+
+    response = default_client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    assert "server-timing" not in response.headers
+
+    timing_settings = settings.model_copy(
+        update={"SERVER_TIMING_ENABLED": True})
+    timing_client = TestClient(create_application(timing_settings))
+
+    response = timing_client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    assert "bcrypt;dur=" in response.headers["server-timing"]
+    assert "db;dur=" in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 403
+
+    response = client.get("/metrics", headers=get_internal_headers())
+
+    assert response.status_code == 200
+    assert (
+        'http_requests_total{method="POST",route="/auth/login",status="200"}'
+        in response.text)
+    assert 'section_duration_seconds_count{section="bcrypt"}' in response.text
+    assert 'section_duration_seconds_count{section="db"}' in response.text
+
+
+def test_request_profiling(tmp_path, monkeypatch) -> None:
+    """Test requests asking for a profile are written to the directory."""
+
+    # bcrypt must run in this process for the profile to include it.
+    monkeypatch.setattr(password_hasher, "enabled", False)
+
+    profiling_settings = settings.model_copy(update={
+        "ENV": "development",
+        "PROFILING_ENABLED": True,
+        "PROFILING_DIRECTORY": str(tmp_path),
+        "PROFILING_MODE": "sampling",
+    })
+    profiling_client = TestClient(create_application(profiling_settings))
+
+    response = profiling_client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    assert response.status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+    response = profiling_client.post(
+        "/auth/login?profile=1",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    profiles = list(tmp_path.iterdir())
+
+    assert response.status_code == 200
+    assert len(profiles) == 1
+    assert "-POST-login_for_access_token-" in profiles[0].name
+    assert "verify_and_update_password" in profiles[0].read_text()
+
+
+def test_membership_filter() -> None:
+    """Test the membership filter skips unknown usernames."""
+
+    membership_filter = MembershipFilter(
+        enabled=True, error_rate=0.01, min_capacity=1000, refresh_seconds=0)
+
+    assert membership_filter.might_contain("username", "unknown@example.com")
+
+    membership_filter.build()
+    membership_filter.add("username", " New.User@example.com")
+
+    assert membership_filter.might_contain("username", "new.user@example.com")
+    assert membership_filter.might_contain(
+        "username", "  NEW.USER@example.com ")
+    assert not membership_filter.might_contain(
+        "username", "unknown@example.com")
+
+    statistics = membership_filter.stats()
+
+    assert statistics["skipped"] == 1
+    assert statistics["filters"]["username"]["false_positive_rate"] < 0.01
+    assert statistics["filters"]["username"]["memory_bytes"] > 0
+
+
+def test_membership_filter_finds_users_of_other_workers(monkeypatch) -> None:
+    """Test users created by another worker can log in straight away."""
+
+    monkeypatch.setattr(app_membership_filter, "enabled", True)
+    monkeypatch.setattr(app_membership_filter, "filters", None)
+    monkeypatch.setattr(app_membership_filter, "last_id", 0)
+    app_membership_filter.build()
+
+    user = AuthUser(
+        username="other.worker@example.com",
+        password=hash_password("password123"),
+        is_active=True)
+
+    with Session(engine) as session:
+        session.add(user)
+        session.commit()
+
+        try:
+            response = client.post(
+                "/auth/login",
+                headers={"client-version": "3.2.1"},
+                data={
+                    "username": " Other.Worker@example.com",
+                    "password": "password123"
+                }
+            )
+
+            assert response.status_code == 200
+            assert app_membership_filter.contains(
+                "username", "other.worker@example.com")
+
+            skipped = app_membership_filter.skipped
+            response = client.post(
+                "/auth/login",
+                headers={"client-version": "3.2.1"},
+                data={
+                    "username": "never.stored@example.com",
+                    "password": "password123"
+                }
+            )
+
+            assert response.status_code == 401
+            assert app_membership_filter.skipped == skipped + 1
+        finally:
+            session.delete(user)
+            session.commit()
+
+
+def test_membership_filter_refresh_cooldown() -> None:
+    """Test API rebuilds of the membership filter are spaced by a cooldown."""
+
+    response = client.post("/internal/membership-filter/refresh")
+
+    assert response.status_code == 403
+
+    response = client.post(
+        "/internal/membership-filter/refresh", headers=get_internal_headers())
+
+    assert response.status_code == 200
+
+    response = client.post(
+        "/internal/membership-filter/refresh", headers=get_internal_headers())
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
@@ -0,0 +1,102 @@
+import pytest
+
+from app.config import jwt_settings
+from app.api.customers.controllers import customer_profile_cache
+from tests.config import assert_statement_budget, get_testing_client
+
+
+client = get_testing_client()
+
+
+@pytest.fixture(autouse=True)
+def default_token_settings(monkeypatch) -> None:
+    """Measure the budgets with the default token settings."""
+
+    monkeypatch.setattr(jwt_settings, "ACCESS_TOKEN_CLAIMS_ENABLED", False)
+    monkeypatch.setattr(jwt_settings, "REFRESH_TOKENS_ENABLED", False)
+
+
+def test_auth_query_budgets() -> None:
+    """Test the number of statements of the authentication routes."""
+
+    with assert_statement_budget(8):
+        response = client.post(
+            "/auth/recover-password",
+            headers={"client-version": "3.3.1"},
+            json={
+                "recovery_code": 1631959404,
+                "email": "sbahtgijwovhje@gmail.com",
+                "password": "password123"
+            }
+        )
+
+    assert response.status_code == 200
+
+    with assert_statement_budget(1):
+        response = client.post(
+            "/auth/login",
+            headers={"client-version": "3.2.1"},
+            data={
+                "username": "sbahtgijwovhje@gmail.com",
+                "password": "password123"
+            }
+        )
+
+    assert response.status_code == 200
+    access_token = response.json()["access_token"]
+
+    with assert_statement_budget(5):
+        response = client.post(
+            "/auth/reset-password",
+            headers={
+                "client-version": "3.2.1",
+                "Authorization": f"Bearer {access_token}"
+            },
+            json={
+                "old_password": "password123",
+                "new_password": "password123"
+            }
+        )
+
+    assert response.status_code == 200
+
+
+def test_customer_query_budgets() -> None:
+    """Test the number of statements of the customer routes."""
+
+    response = client.post(
+        "/auth/login",
+        headers={"client-version": "3.2.1"},
+        data={
+            "username": "sbahtgijwovhje@gmail.com",
+            "password": "password123"
+        }
+    )
+
+    access_token = response.json()["access_token"]
+    headers = {
+        "client-version": "3.2.1",
+        "Authorization": f"Bearer {access_token}"
+    }
+
+    customer_profile_cache.clear()
+
+    with assert_statement_budget(1):
+        response = client.get("/customers/me", headers=headers)
+
+    assert response.status_code == 200
+
+    with assert_statement_budget(1):
+        response = client.get("/customers/me", headers=headers)
+
+    assert response.status_code == 200
+
+    for language in ("en", "de"):
+        with assert_statement_budget(3):
+            response = client.put(
+                "/customers/me/edit-data",
+                headers=headers,
+                json={"language": language}
+            )
+
+        assert response.status_code == 200
@@ -0,0 +1,74 @@
+import pytest
+
+from app.api.common.versions import (
+    VersionConfigurationError,
+    VersionConstroller,
+    parse_client_version
+)
+from tests.config import get_testing_client
+
+
+client = get_testing_client()
+
+
+def test_outdated_client_rejected_before_body_parsing() -> None:
+    """Test version header is checked before body and authentication."""
+
+    response = client.put(
+        "/customers/me/edit-data",
+        headers={"client-version": "2.0.9"},
+        content="not a json body"
+    )
+
+    json_response = response.json()
+    expected_detail = "Header app-version '2.0.9' is lower than 2.1.0."
+
+    assert response.status_code == 422
+    assert json_response["detail"] == expected_detail
+
+    response = client.get("/customers/me")
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Header client-version is required."
+
+
+def test_per_route_minimum_versions() -> None:
+    """Test the longest configured prefix sets the minimum version."""
+
+    version_controller = VersionConstroller({
+        "/customers": "2.1.0",
+        "/customers/me/edit-data": "3.0.0",
+    })
+
+    assert version_controller.get_minimum_version(
+        "/customers/me") == "2.1.0"
+    assert version_controller.get_minimum_version(
+        "/customers/me/edit-data") == "3.0.0"
+    assert version_controller.get_minimum_version("/customersx") is None
+    assert version_controller.get_minimum_version("/internal/pool-stats") is None
+
+    assert version_controller.get_version_error(
+        "2.5.0", "3.0.0") == "Header app-version '2.5.0' is lower than 3.0.0."
+    assert version_controller.get_version_error("3.0.0", "3.0.0") is None
+
+
+def test_invalid_minimum_versions_fail_on_build() -> None:
+    """Test invalid configured minimums are rejected before any request."""
+
+    with pytest.raises(VersionConfigurationError, match="not-a-version"):
+        VersionConstroller({"/customers": "not-a-version"})
+
+
+def test_parsed_versions_are_memoized() -> None:
+    """Test repeated headers are parsed once."""
+
+    parse_client_version.cache_clear()
+
+    parse_client_version("3.2.1")
+    parse_client_version("3.2.1")
+    parse_client_version("dasdas")
+
+    cache_info = parse_client_version.cache_info()
+
+    assert cache_info.hits == 1
+    assert cache_info.misses == 2